@@ -1,7 +1,12 @@
+import sys
 import pandas as pd
-import numpy as np
 from pathlib import Path
-from scipy.stats import poisson
+
+from almacen_sqlite import ALMACEN_PATH, conectar, registrar_predicciones
+from calibracion_probabilidades import aplicar_calibracion, cargar_calibracion
+from carga_jornadas import FIXTURES_PATH, cargar_fixtures, guardar_columnar
+from indice_asof import calcular_metricas_asof, construir_indice_asof
+from modelo_conteo_corners import modelo_desde_coefs, puntuar_lote
 
 # --- CONFIGURACIÓN DE RUTAS ---
 BASE_DIR = Path(__file__).resolve().parent
@@ -11,18 +16,21 @@ PROYECTO_ROOT = BASE_DIR.parent
 BASE_CONSOLIDADA_PATH = PROYECTO_ROOT / '03_Datos_Limpios' / 'premier_league_BASE_CONSOLIDADA.csv'
 OUTPUT_PROBABILIDADES_PATH = PROYECTO_ROOT / '04_Modelos_Entrenados' / 'predicciones_jornada_V6_REAL.csv'
 CUOTAS_PATH = PROYECTO_ROOT / '04_Modelos_Entrenados' / 'cuotas_jornada.csv' # Archivo que debes crear
+CALIBRACION_PATH = PROYECTO_ROOT / '04_Modelos_Entrenados' / 'calibracion_V6.json' # Opcional: 'calibracion_probabilidades.py'
+OUTPUT_COLUMNAR_PATH = PROYECTO_ROOT / '04_Modelos_Entrenados' / 'predicciones_V6.parquet'
+# Partidos a predecir: FIXTURES_PATH ('jornada_futura.csv') o el CSV/ICS pasado como argumento
 
 # --- COEFICIENTES DEL MODELO POISSON V6.0 ---
 COEFS_V6 = {
-    'Local_CORNERS_AF_AVG': 0.0098,
-    'Local_CORNERS_EC_AVG': 0.0172,
-    'Visitante_CORNERS_AF_AVG': 0.0172,
-    'Visitante_CORNERS_EC_AVG': 0.0098,
-    'Local_ST_AF_AVG': 0.0052,
-    'Local_ST_EC_AVG': 0.0011,
-    'Visitante_ST_AF_AVG': 0.0011,
-    'Visitante_ST_EC_AVG': 0.0052,
-    'FACTOR_LOCAL': 1.8835
+    'Local_CORNERS_AF_AVG': -0.0002,
+    'Local_CORNERS_EC_AVG': 0.0075,
+    'Visitante_CORNERS_AF_AVG': 0.0075,
+    'Visitante_CORNERS_EC_AVG': -0.0002,
+    'Local_ST_AF_AVG': 0.0110,
+    'Local_ST_EC_AVG': 0.0118,
+    'Visitante_ST_AF_AVG': 0.0118,
+    'Visitante_ST_EC_AVG': 0.0110,
+    'FACTOR_LOCAL': 1.6664
 }
 
 # --- PARÁMETROS DE CÁLCULO ---
@@ -30,56 +38,8 @@ N_CORNERS = 5
 N_ST = 10
 UMBRALES_ENTEROS = [7, 8, 9, 10, 11, 12] # Umbrales X.5 a calcular (de 7.5 a 12.5)
 
-# 🚨 DEFINICIÓN MANUAL DE LA PRÓXIMA JORNADA 🚨
-JORNADA_FUTURA = pd.DataFrame({
-    'Fecha': ['2025-10-03', '2025-10-04', '2025-10-04', '2025-10-04', '2025-10-04', 
-             '2025-10-05', '2025-10-05', '2025-10-05', '2025-10-05', '2025-10-05'],
-    'Local': ['Bournemouth', 'Leeds', 'Arsenal', 'Man United', 'Chelsea', 
-              'Aston Villa', 'Everton', 'Newcastle', 'Wolverhampton Wanderers', 'Brentford'],
-    'Visitante': ['Fulham', 'Tottenham', 'West Ham', 'Sunderland', 'Liverpool', 
-                  'Burnley', 'Crystal Palace', 'Nottingham Forest', 'Brighton & Hove Albion', 'Man City']
-})
-
-# --- FUNCIONES BASE DEL MODELO ---
-
-def calcular_promedios_instantaneos(df_historial, equipo, metrica, N):
-    """Calcula el promedio móvil FINAL (previo al partido) para un equipo."""
-    # ... (El código de esta función es el mismo que enviaste) ...
-    df_equipo_calc = df_historial[(df_historial['Local'] == equipo) | (df_historial['Visitante'] == equipo)].copy()
-    if df_equipo_calc.empty:
-        return {f'{metrica}_AF_AVG': np.nan, f'{metrica}_EC_AVG': np.nan}
-
-    if metrica == 'HC':
-        col_home, col_away = 'HC', 'AC'
-    else:
-        col_home, col_away = metrica + '_H', metrica + '_A'
-    
-    af = np.where(df_equipo_calc['Local'] == equipo, df_equipo_calc[col_home], df_equipo_calc[col_away])
-    ec = np.where(df_equipo_calc['Local'] == equipo, df_equipo_calc[col_away], df_equipo_calc[col_home])
-    
-    af_series, ec_series = pd.Series(af), pd.Series(ec)
-    avg_af = af_series.shift(1).rolling(window=N, min_periods=1).mean().iloc[-1]
-    avg_ec = ec_series.shift(1).rolling(window=N, min_periods=1).mean().iloc[-1]
-
-    return {f'{metrica}_AF_AVG': avg_af, f'{metrica}_EC_AVG': avg_ec}
-
-def calcular_lambda(row):
-    """Calcula la Tasa de Córners Esperada (lambda) para un partido."""
-    if row.isnull().any():
-        return np.nan
-
-    lambda_exp = (
-        COEFS_V6['Local_CORNERS_AF_AVG'] * row['Local_CORNERS_AF_AVG'] +
-        COEFS_V6['Local_CORNERS_EC_AVG'] * row['Local_CORNERS_EC_AVG'] +
-        COEFS_V6['Visitante_CORNERS_AF_AVG'] * row['Visitante_CORNERS_AF_AVG'] +
-        COEFS_V6['Visitante_CORNERS_EC_AVG'] * row['Visitante_CORNERS_EC_AVG'] +
-        COEFS_V6['Local_ST_AF_AVG'] * row['Local_ST_AF_AVG'] +
-        COEFS_V6['Local_ST_EC_AVG'] * row['Local_ST_EC_AVG'] +
-        COEFS_V6['Visitante_ST_AF_AVG'] * row['Visitante_ST_AF_AVG'] +
-        COEFS_V6['Visitante_ST_EC_AVG'] * row['Visitante_ST_EC_AVG'] +
-        COEFS_V6['FACTOR_LOCAL'] * row['FACTOR_LOCAL']
-    )
-    return np.exp(lambda_exp)
+# --- MODELO PARA EL SCORING POR LOTES ---
+MODELO_V6 = modelo_desde_coefs(COEFS_V6)
 
 # --- FUNCIÓN DE ANÁLISIS DE KELLY (NUEVA) ---
 
@@ -157,7 +117,7 @@ def analizar_valor_kelly(df_probabilidades, df_cuotas):
 
 # --- FUNCIÓN PRINCIPAL DE PREDICCIÓN ---
 
-def predecir_jornada_real(consolidada_path, output_path, jornada_df):
+def predecir_jornada_real(consolidada_path, output_path, jornada_df, columnar_path=None):
     
     try:
         # 1. Cargar y limpiar el historial de partidos
@@ -171,47 +131,38 @@ def predecir_jornada_real(consolidada_path, output_path, jornada_df):
         print(f"🚨 ERROR al cargar la base consolidada: {e}")
         return
     
-    df_prediccion = jornada_df.copy()
-    metricas_jornada = []
-
-    # 2. Calcular Métricas
-    for index, row in df_prediccion.iterrows():
-        # ... (Cálculo de métricas) ...
-        local, visitante = row['Local'], row['Visitante']
-        c_local = calcular_promedios_instantaneos(df_historial, local, 'HC', N_CORNERS)
-        st_local = calcular_promedios_instantaneos(df_historial, local, 'ST', N_ST)
-        c_visitante = calcular_promedios_instantaneos(df_historial, visitante, 'HC', N_CORNERS)
-        st_visitante = calcular_promedios_instantaneos(df_historial, visitante, 'ST', N_ST)
-        
-        metricas = {
-            'Local': local, 'Visitante': visitante,
-            'Local_CORNERS_AF_AVG': c_local['HC_AF_AVG'], 'Local_CORNERS_EC_AVG': c_local['HC_EC_AVG'],
-            'Visitante_CORNERS_AF_AVG': c_visitante['HC_AF_AVG'], 'Visitante_CORNERS_EC_AVG': c_visitante['HC_EC_AVG'],
-            'Local_ST_AF_AVG': st_local['ST_AF_AVG'], 'Local_ST_EC_AVG': st_local['ST_EC_AVG'],
-            'Visitante_ST_AF_AVG': st_visitante['ST_AF_AVG'], 'Visitante_ST_EC_AVG': st_visitante['ST_EC_AVG'],
-            'FACTOR_LOCAL': 1.0 
-        }
-        metricas_jornada.append(metricas)
-
-    # 3. Unir las métricas y aplicar el modelo
-    df_prediccion_con_metricas = pd.DataFrame(metricas_jornada)
-    df_prediccion_con_metricas['Lambda_Esperada'] = df_prediccion_con_metricas.apply(calcular_lambda, axis=1)
-    
-    # 4. Calcular TODAS las Probabilidades de Umbral (P.M.)
-    for X in UMBRALES_ENTEROS:
-        df_prediccion_con_metricas[f'Prob_MAS_{X}_5'] = poisson.sf(X, df_prediccion_con_metricas['Lambda_Esperada'])
-        df_prediccion_con_metricas[f'Prob_MENOS_{X}_5'] = poisson.cdf(X, df_prediccion_con_metricas['Lambda_Esperada'])
+    # 2. Calcular Métricas a fecha de cada partido (índice as-of: sólo partidos anteriores)
+    indice = construir_indice_asof(df_historial)
+    df_prediccion_con_metricas = calcular_metricas_asof(indice, jornada_df, N_CORNERS, N_ST)
+
+    # 3 y 4. Aplicar el modelo y calcular TODAS las Probabilidades de Umbral (P.M.) en un solo lote
+    df_probabilidades = puntuar_lote(df_prediccion_con_metricas, MODELO_V6, UMBRALES_ENTEROS)
+    df_prediccion_con_metricas = pd.concat([df_prediccion_con_metricas, df_probabilidades], axis=1)
+
+    # 4b. Calibrar las probabilidades (si existe el mapa entrenado junto al modelo)
+    calibracion = cargar_calibracion(CALIBRACION_PATH)
+    if calibracion is not None:
+        df_prediccion_con_metricas = aplicar_calibracion(df_prediccion_con_metricas, calibracion)
+        print(f"🎯 Probabilidades calibradas con: {CALIBRACION_PATH.name} ({calibracion['metodo']})")
     
     # 5. Generar Previsiones Finales
-    columnas_finales = ['Local', 'Visitante', 'Lambda_Esperada'] + \
+    columnas_finales = ['Fecha', 'Local', 'Visitante', 'Lambda'] + \
                        [col for col in df_prediccion_con_metricas.columns if 'Prob_' in col]
                        
     df_final = df_prediccion_con_metricas[columnas_finales].copy()
-    df_final.rename(columns={'Lambda_Esperada': 'Lambda'}, inplace=True)
     
-    # Guardar Resultados
+    # Guardar Resultados (CSV para el análisis de Kelly + copia columnar para proyecciones largas)
     output_path.parent.mkdir(parents=True, exist_ok=True)
     df_final.to_csv(output_path, index=False)
+    if columnar_path is not None:
+        ruta = guardar_columnar(df_final, columnar_path)
+        print(f"✅ {len(df_final)} partidos puntuados. Salida columnar: {ruta.name}")
+
+    # Registro de predicciones en el almacén SQLite (si se creó con 'almacen_sqlite.py')
+    if ALMACEN_PATH.exists():
+        con = conectar(ALMACEN_PATH)
+        registrar_predicciones(con, df_final, modelo='V6')
+        con.close()
     
     return df_final
 
@@ -220,8 +171,17 @@ def predecir_jornada_real(consolidada_path, output_path, jornada_df):
 
 if __name__ == "__main__":
     
+    # 0. Cargar los partidos a predecir (una jornada o el resto de la temporada)
+    fixtures_path = Path(sys.argv[1]) if len(sys.argv) > 1 else FIXTURES_PATH
+    try:
+        jornada_futura = cargar_fixtures(fixtures_path)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"\n🚨 ERROR al cargar los partidos ({fixtures_path.name}): {e}")
+        exit()
+
     # 1. Ejecutar Predicción ML y obtener la tabla de probabilidades
-    df_probabilidades = predecir_jornada_real(BASE_CONSOLIDADA_PATH, OUTPUT_PROBABILIDADES_PATH, JORNADA_FUTURA)
+    df_probabilidades = predecir_jornada_real(BASE_CONSOLIDADA_PATH, OUTPUT_PROBABILIDADES_PATH, jornada_futura,
+                                              OUTPUT_COLUMNAR_PATH)
     
     # 2. Intentar cargar las cuotas y realizar el análisis de Kelly
     print("\n" + "="*80)
@@ -25,7 +25,8 @@ NAME_MAPPING = {
 }
 
 
-def consolidar_datos(raw_path, output_path):
+def construir_base_consolidada(raw_path):
+    """Lee y limpia todos los CSV brutos. Devuelve el DataFrame consolidado (o None si no hay archivos)."""
     all_data = []
     
     print(f"Buscando archivos en: {raw_path}")
@@ -35,7 +36,7 @@ def consolidar_datos(raw_path, output_path):
     
     if not file_list:
         print("Fallo en la consolidación: No se encontraron archivos CSV.")
-        return
+        return None
 
     for file_path in file_list:
         try:
@@ -90,9 +91,14 @@ def consolidar_datos(raw_path, output_path):
                   'HC', 'AC', 'HST', 'AST', 'FT_H', 'FT_A', 'OFF_H', 'OFF_A',
                   'Total_Tiros', 'Total_Tiros_Libres', 'Total_Offsides', 'Total_Corners']
     
-    df_consolidado = df_consolidado[cols_final]
-    
-    
+    return df_consolidado[cols_final]
+
+
+def consolidar_datos(raw_path, output_path):
+    df_consolidado = construir_base_consolidada(raw_path)
+    if df_consolidado is None:
+        return
+
     output_path.parent.mkdir(parents=True, exist_ok=True)
     df_consolidado.to_csv(output_path, index=False)
     
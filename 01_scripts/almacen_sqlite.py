@@ -0,0 +1,265 @@
+import sys
+import json
+import time
+import sqlite3
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# --- CONFIGURACIÓN DE RUTAS ---
+BASE_DIR = Path(__file__).resolve().parent
+PROYECTO_ROOT = BASE_DIR.parent
+
+BASE_CONSOLIDADA_PATH = PROYECTO_ROOT / '03_Datos_Limpios' / 'premier_league_BASE_CONSOLIDADA.csv'
+ALMACEN_PATH = PROYECTO_ROOT / '03_Datos_Limpios' / 'premier_league.sqlite'
+# Copia del historial en CSV (sólo se escribe con --exportar)
+EXPORT_CSV_PATH = PROYECTO_ROOT / '03_Datos_Limpios' / 'premier_league_BASE_CONSOLIDADA_export.csv'
+
+# --- PARÁMETROS ---
+DIVISION_POR_DEFECTO = 'E0' # La base consolidada sólo contiene Premier League
+N_CORNERS = 5
+N_ST = 10
+MES_INICIO_TEMPORADA = 7 # Desde julio cuenta como temporada nueva
+
+# --- ESQUEMA ---
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS partidos (
+    id          INTEGER PRIMARY KEY,
+    fecha       TEXT NOT NULL,
+    temporada   TEXT NOT NULL,
+    division    TEXT NOT NULL,
+    local       TEXT NOT NULL,
+    visitante   TEXT NOT NULL,
+    resultado   TEXT,
+    hc REAL, ac REAL, st_h REAL, st_a REAL, ft_h REAL, ft_a REAL, off_h REAL, off_a REAL,
+    UNIQUE (fecha, local, visitante)
+);
+CREATE INDEX IF NOT EXISTS idx_partidos_temporada_division ON partidos (temporada, division, fecha);
+
+-- Una fila por (partido, equipo), agrupada físicamente por (equipo, fecha)
+CREATE TABLE IF NOT EXISTS partidos_equipo (
+    equipo      TEXT NOT NULL,
+    fecha       TEXT NOT NULL,
+    partido_id  INTEGER NOT NULL REFERENCES partidos (id),
+    es_local    INTEGER NOT NULL,
+    corners_af REAL, corners_ec REAL, st_af REAL, st_ec REAL,
+    PRIMARY KEY (equipo, fecha, partido_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS predicciones (
+    id              INTEGER PRIMARY KEY,
+    creado          TEXT NOT NULL,
+    fecha           TEXT,
+    local           TEXT NOT NULL,
+    visitante       TEXT NOT NULL,
+    modelo          TEXT NOT NULL,
+    lambda          REAL,
+    probabilidades  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_predicciones_partido ON predicciones (fecha, local, visitante);
+"""
+
+COLUMNAS_HISTORIAL = ['Fecha', 'Local', 'Visitante', 'Resultado_Final',
+                      'HC', 'AC', 'ST_H', 'ST_A', 'FT_H', 'FT_A', 'OFF_H', 'OFF_A']
+
+# --- CONEXIÓN ---
+
+def conectar(db_path=ALMACEN_PATH, solo_lectura=False):
+    """
+    Abre el almacén. En modo escritura activa WAL, que permite lectores concurrentes
+    mientras se escribe; en solo lectura cada hilo/proceso debe abrir su propia conexión.
+    """
+    if solo_lectura:
+        return sqlite3.connect(f'file:{db_path}?mode=ro', uri=True, check_same_thread=False)
+
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(db_path)
+    con.execute('PRAGMA journal_mode=WAL')
+    con.execute('PRAGMA synchronous=NORMAL')
+    con.executescript(ESQUEMA)
+    return con
+
+
+def temporada_de(fechas):
+    """'2024-25' para partidos entre julio de 2024 y junio de 2025."""
+    fechas = pd.to_datetime(pd.Series(fechas))
+    inicio = fechas.dt.year - (fechas.dt.month < MES_INICIO_TEMPORADA).astype(int)
+    return inicio.astype(str) + '-' + ((inicio + 1) % 100).astype(str).str.zfill(2)
+
+# --- CARGA ---
+
+def importar_historial(con, df_historial, division=DIVISION_POR_DEFECTO):
+    """Inserta (o actualiza) los partidos y regenera sus filas por equipo. Devuelve el nº de partidos."""
+    df = df_historial[COLUMNAS_HISTORIAL].copy()
+    df['Fecha'] = pd.to_datetime(df['Fecha']).dt.strftime('%Y-%m-%d')
+    df['Temporada'] = temporada_de(df['Fecha']).to_numpy()
+    df['Division'] = df_historial['Division'] if 'Division' in df_historial.columns else division
+    df = df.astype(object).where(df.notna(), None)
+
+    with con:
+        con.executemany(
+            """INSERT INTO partidos (fecha, temporada, division, local, visitante, resultado,
+                                     hc, ac, st_h, st_a, ft_h, ft_a, off_h, off_a)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT (fecha, local, visitante) DO UPDATE SET
+                   temporada = excluded.temporada, division = excluded.division, resultado = excluded.resultado,
+                   hc = excluded.hc, ac = excluded.ac, st_h = excluded.st_h, st_a = excluded.st_a,
+                   ft_h = excluded.ft_h, ft_a = excluded.ft_a, off_h = excluded.off_h, off_a = excluded.off_a""",
+            df[['Fecha', 'Temporada', 'Division', 'Local', 'Visitante', 'Resultado_Final',
+                'HC', 'AC', 'ST_H', 'ST_A', 'FT_H', 'FT_A', 'OFF_H', 'OFF_A']].itertuples(index=False, name=None)
+        )
+        # Vista por equipo (AF/EC) derivada de 'partidos' en SQL, sin pasar por Python
+        con.execute('DELETE FROM partidos_equipo')
+        con.execute("""
+            INSERT INTO partidos_equipo (equipo, fecha, partido_id, es_local, corners_af, corners_ec, st_af, st_ec)
+            SELECT local, fecha, id, 1, hc, ac, st_h, st_a FROM partidos
+            UNION ALL
+            SELECT visitante, fecha, id, 0, ac, hc, st_a, st_h FROM partidos
+        """)
+    return len(df)
+
+# --- CONSULTAS INDEXADAS ---
+
+def historial_equipo(con, equipo, hasta=None, n=None):
+    """Partidos de un equipo anteriores a 'hasta' (los n más recientes), vía el índice (equipo, fecha)."""
+    hasta = '9999-12-31' if hasta is None else pd.Timestamp(hasta).strftime('%Y-%m-%d')
+    consulta = """SELECT fecha, partido_id, es_local, corners_af, corners_ec, st_af, st_ec
+                  FROM partidos_equipo WHERE equipo = ? AND fecha < ?
+                  ORDER BY fecha DESC LIMIT ?"""
+    df = pd.read_sql_query(consulta, con, params=(equipo, hasta, -1 if n is None else n))
+    return df.iloc[::-1].reset_index(drop=True)
+
+
+def forma_asof_sql(con, equipo, fecha, n_corners=N_CORNERS, n_st=N_ST):
+    """Promedios AF/EC previos a 'fecha' (mismas claves que indice_asof.forma_asof)."""
+    fecha = pd.Timestamp(fecha).strftime('%Y-%m-%d')
+    plantilla = """SELECT AVG({a}), AVG({b}) FROM (
+                       SELECT {a}, {b} FROM partidos_equipo
+                       WHERE equipo = ? AND fecha < ? ORDER BY fecha DESC LIMIT ?)"""
+    c_af, c_ec = con.execute(plantilla.format(a='corners_af', b='corners_ec'), (equipo, fecha, n_corners)).fetchone()
+    s_af, s_ec = con.execute(plantilla.format(a='st_af', b='st_ec'), (equipo, fecha, n_st)).fetchone()
+    nan = lambda v: np.nan if v is None else v
+    return {'CORNERS_AF_AVG': nan(c_af), 'CORNERS_EC_AVG': nan(c_ec), 'ST_AF_AVG': nan(s_af), 'ST_EC_AVG': nan(s_ec)}
+
+
+def partidos_temporada(con, temporada, division=DIVISION_POR_DEFECTO):
+    """Todos los partidos de una temporada/división, vía el índice (temporada, division)."""
+    return pd.read_sql_query(
+        'SELECT * FROM partidos WHERE temporada = ? AND division = ? ORDER BY fecha', con, params=(temporada, division)
+    )
+
+
+def cargar_historial(con):
+    """Historial completo con los nombres de columnas del modelo V6.0 (para los scripts existentes)."""
+    df = pd.read_sql_query(
+        """SELECT fecha, local, visitante, resultado, hc, ac, st_h, st_a, ft_h, ft_a, off_h, off_a
+           FROM partidos ORDER BY fecha, id""", con
+    )
+    df.columns = COLUMNAS_HISTORIAL
+    df['Fecha'] = pd.to_datetime(df['Fecha'])
+    return df
+
+# --- REGISTRO DE PREDICCIONES ---
+
+def registrar_predicciones(con, df_predicciones, modelo='V6'):
+    """Guarda Lambda y todas las Prob_* de cada partido predicho (las probabilidades como JSON)."""
+    creado = pd.Timestamp.now().isoformat(timespec='seconds')
+    cols_prob = [c for c in df_predicciones.columns if c.startswith('Prob_')]
+    fechas = (pd.to_datetime(df_predicciones['Fecha']).dt.strftime('%Y-%m-%d')
+              if 'Fecha' in df_predicciones.columns else pd.Series([None] * len(df_predicciones)))
+    filas = [
+        (creado, f, l, v, modelo, float(lam), json.dumps(dict(zip(cols_prob, map(float, probs)))))
+        for f, l, v, lam, probs in zip(fechas, df_predicciones['Local'], df_predicciones['Visitante'],
+                                       df_predicciones['Lambda'], df_predicciones[cols_prob].to_numpy())
+    ]
+    with con:
+        con.executemany(
+            """INSERT INTO predicciones (creado, fecha, local, visitante, modelo, lambda, probabilidades)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""", filas
+        )
+    return len(filas)
+
+
+def predicciones_partido(con, local, visitante, fecha=None):
+    """Historial de predicciones registradas para un partido (vía idx_predicciones_partido)."""
+    if fecha is None:
+        consulta, params = 'SELECT * FROM predicciones WHERE local = ? AND visitante = ? ORDER BY creado', (local, visitante)
+    else:
+        consulta = 'SELECT * FROM predicciones WHERE fecha = ? AND local = ? AND visitante = ? ORDER BY creado'
+        params = (pd.Timestamp(fecha).strftime('%Y-%m-%d'), local, visitante)
+    return pd.read_sql_query(consulta, con, params=params)
+
+
+def exportar_csv(con, output_path):
+    """Exporta el historial con el formato de 'premier_league_BASE_CONSOLIDADA.csv'."""
+    df = cargar_historial(con)
+    df = df.rename(columns={'ST_H': 'HST', 'ST_A': 'AST'})
+    df['Total_Tiros'] = df['HST'] + df['AST']
+    df['Total_Tiros_Libres'] = df['FT_H'] + df['FT_A']
+    df['Total_Offsides'] = df['OFF_H'] + df['OFF_A']
+    df['Total_Corners'] = df['HC'] + df['AC']
+    # SQLite devuelve REAL: se vuelven a escribir como enteros (con huecos) igual que el CSV original
+    cols_numericas = df.columns[4:]
+    df[cols_numericas] = df[cols_numericas].astype('Int64')
+    df['Fecha'] = df['Fecha'].dt.strftime('%Y-%m-%d')
+    df.to_csv(output_path, index=False)
+
+# --- EJECUCIÓN DEL SCRIPT ---
+
+def construir_almacen(consolidada_path, db_path, exportar=False):
+    try:
+        df_historial = pd.read_csv(consolidada_path)
+        df_historial.columns = COLUMNAS_HISTORIAL + ['Total_Tiros', 'Total_Tiros_Libres', 'Total_Offsides', 'Total_Corners']
+    except Exception as e:
+        print(f"🚨 ERROR al cargar la base consolidada: {e}")
+        return
+
+    con = conectar(db_path)
+    n = importar_historial(con, df_historial)
+
+    equipo = df_historial['Local'].iloc[-1]
+    plan = con.execute(
+        'EXPLAIN QUERY PLAN SELECT * FROM partidos_equipo WHERE equipo = ? AND fecha < ? ORDER BY fecha DESC LIMIT 5',
+        (equipo, '9999-12-31')
+    ).fetchall()
+
+    # Comparación: filtro por equipo con escaneo completo en pandas vs. consulta indexada
+    t0 = time.perf_counter()
+    for _ in range(200):
+        df_historial[(df_historial['Local'] == equipo) | (df_historial['Visitante'] == equipo)]
+    t_pandas = (time.perf_counter() - t0) / 200
+
+    t0 = time.perf_counter()
+    for _ in range(200):
+        forma_asof_sql(con, equipo, '9999-12-31')
+    t_sql = (time.perf_counter() - t0) / 200
+
+    # Lectores concurrentes en solo lectura (una conexión por hilo)
+    equipos = pd.unique(df_historial['Local'])
+    def leer(eq):
+        lector = conectar(db_path, solo_lectura=True)
+        try:
+            return forma_asof_sql(lector, eq, '9999-12-31')
+        finally:
+            lector.close()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        formas = list(pool.map(leer, equipos))
+
+    if exportar:
+        exportar_csv(con, EXPORT_CSV_PATH)
+    con.close()
+
+    print("\n" + "="*80)
+    print("      🗄️ ALMACÉN SQLITE CONSTRUIDO")
+    print(f"      Archivo: {db_path.name} | Partidos: {n}")
+    print("="*80)
+    print(f"Plan de consulta por equipo: {plan[0][-1]}")
+    print(f"Filtro pandas (escaneo completo): {t_pandas * 1e6:.0f} µs | Forma as-of SQL (índice): {t_sql * 1e6:.0f} µs")
+    print(f"Lectores concurrentes: {len(formas)} equipos consultados en paralelo.")
+    if exportar:
+        print(f"Exportación CSV: {EXPORT_CSV_PATH.name}")
+
+
+if __name__ == "__main__":
+    construir_almacen(BASE_CONSOLIDADA_PATH, ALMACEN_PATH, exportar='--exportar' in sys.argv)
@@ -0,0 +1,250 @@
+import re
+import sys
+import time
+import warnings
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+from carga_jornadas import NAME_MAPPING
+
+# --- CONFIGURACIÓN DE RUTAS ---
+BASE_DIR = Path(__file__).resolve().parent
+PROYECTO_ROOT = BASE_DIR.parent
+
+# Archivo de cuotas: los CSV brutos de football-data (una o varias ligas/temporadas, también en subcarpetas)
+DATOS_RAW_PATH = PROYECTO_ROOT / '02_Datos_Brutos'
+# La salida NO va a '02_Datos_Brutos': la consolidación lee todos los CSV de esa carpeta
+OUTPUT_CLV_PATH = PROYECTO_ROOT / '04_Modelos_Entrenados' / 'clv_resumen.csv'
+
+# --- PARÁMETROS DE ANÁLISIS ---
+CASA_REFERENCIA = 'PS'  # Probabilidad "justa" de referencia: cierre sin margen de Pinnacle
+ALIAS_CASAS = {'P': 'PS'} # football-data usa 'PS' en 1X2 y 'P' en Más/Menos y hándicap asiático
+PERCENTILES_EDGE = [5, 50, 95]
+
+# Lados de cada mercado: (sufijo de columna, etiqueta)
+LADOS_1X2 = [('H', 'Local'), ('D', 'Empate'), ('A', 'Visitante')]
+LADOS_GOLES = [('>2.5', 'Mas_2.5'), ('<2.5', 'Menos_2.5')]
+LADOS_AH = [('AHH', 'Local'), ('AHA', 'Visitante')]
+
+# --- CARGA DEL ARCHIVO HISTÓRICO ---
+
+def _leer_csv(path):
+    try:
+        return pd.read_csv(path, encoding='utf-8-sig', low_memory=False)
+    except UnicodeDecodeError:
+        return pd.read_csv(path, encoding='latin1', low_memory=False)
+
+
+def cargar_archivo_cuotas(raw_path, patron='**/*.[Cc][Ss][Vv]'):
+    """Concatena todos los CSV brutos (cualquier liga y temporada) conservando TODAS las columnas de cuotas."""
+    archivos = sorted(Path(raw_path).glob(patron))
+    if not archivos:
+        raise FileNotFoundError(f"No hay archivos CSV en {raw_path}")
+
+    frames, nombres = [], []
+    for path in archivos:
+        df = _leer_csv(path)
+        df.columns = [str(c).strip() for c in df.columns]
+        df = df.dropna(subset=['Date', 'HomeTeam', 'AwayTeam'])
+        frames.append(df)
+        nombres.append(np.repeat(path.name, len(df)))
+
+    df = pd.concat(frames, ignore_index=True)
+    # Columnas nuevas en un solo bloque (el archivo tiene más de cien columnas de cuotas)
+    extra = pd.DataFrame({
+        'Archivo': np.concatenate(nombres),
+        'Fecha': pd.to_datetime(df['Date'], dayfirst=True, format='mixed'),
+        'Local': df['HomeTeam'].str.strip().replace(NAME_MAPPING),
+        'Visitante': df['AwayTeam'].str.strip().replace(NAME_MAPPING),
+    })
+    df = pd.concat([df, extra], axis=1)
+    return df.sort_values(by='Fecha', kind='stable').reset_index(drop=True)
+
+# --- DETECCIÓN DE SERIES (casa x mercado x lado) ---
+
+def detectar_series(columnas):
+    """
+    Empareja columnas de apertura y cierre de cada casa. El cierre inserta una 'C' tras el
+    código de la casa (B365H -> B365CH, P>2.5 -> PC>2.5, B365AHH -> B365CAHH).
+    Devuelve una fila por serie: Casa, Mercado, Lado, Col_Apertura, Col_Cierre.
+    """
+    columnas = set(columnas)
+    filas = []
+    for mercado, lados, patron in [('1X2', LADOS_1X2, r'^(.+)H$'),
+                                   ('Goles_2.5', LADOS_GOLES, r'^(.+)>2\.5$'),
+                                   ('Handicap_Asiatico', LADOS_AH, r'^(.+)AHH$')]:
+        prefijos = {m.group(1) for c in columnas if (m := re.match(patron, c))}
+        # Un prefijo es una casa si tiene todos los lados del mercado (descarta p.ej. 'HTH', 'FTHG')
+        casas = {p for p in prefijos if all(p + sufijo in columnas for sufijo, _ in lados)}
+        for casa in sorted(casas):
+            cierre = casa + 'C'
+            if casa.endswith('C') and casa[:-1] in casas:
+                continue # Es la columna de cierre de otra casa
+            if cierre not in casas:
+                continue # Sin precio de cierre no hay CLV
+            for sufijo, lado in lados:
+                filas.append({'Casa': ALIAS_CASAS.get(casa, casa), 'Mercado': mercado, 'Lado': lado,
+                              'Col_Apertura': casa + sufijo, 'Col_Cierre': cierre + sufijo})
+    return pd.DataFrame(filas)
+
+
+def matrices_cuotas(df, series):
+    """Cuotas de apertura y cierre como matrices (partidos x series); las que faltan quedan en NaN."""
+    a = df.reindex(columns=series['Col_Apertura']).apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    c = df.reindex(columns=series['Col_Cierre']).apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    # Cuotas <= 1 no son apuestas válidas
+    return np.where(a > 1, a, np.nan), np.where(c > 1, c, np.nan)
+
+
+def probabilidades_sin_margen(cuotas, series):
+    """
+    Probabilidad implícita normalizada dentro de cada (casa, mercado): 1/cuota dividido por la
+    suma de todos los lados (elimina el margen). Se calcula con una matriz de incidencia series x grupos;
+    si falta algún lado del grupo en un partido, el resultado es NaN.
+    """
+    grupos = pd.factorize(series['Casa'] + '|' + series['Mercado'])[0]
+    G = np.zeros((len(series), grupos.max() + 1))
+    G[np.arange(len(series)), grupos] = 1.0
+    implicita = 1.0 / cuotas
+    valida = ~np.isnan(implicita)
+    sumas = np.where(valida, implicita, 0.0) @ G
+    completos = (valida @ G) == G.sum(axis=0)
+    return implicita / np.where(completos, sumas, np.nan)[:, grupos]
+
+
+def resultados_series(df, series):
+    """1 si el lado ganó, 0 si perdió; NaN para el hándicap asiático (líneas de cuarto con medias apuestas)."""
+    gl = pd.to_numeric(df['FTHG'], errors='coerce').to_numpy(dtype=float)
+    gv = pd.to_numeric(df['FTAG'], errors='coerce').to_numpy(dtype=float)
+    resultado = {
+        ('1X2', 'Local'): gl > gv, ('1X2', 'Empate'): gl == gv, ('1X2', 'Visitante'): gl < gv,
+        ('Goles_2.5', 'Mas_2.5'): gl + gv > 2.5, ('Goles_2.5', 'Menos_2.5'): gl + gv < 2.5,
+    }
+    salida = np.full((len(df), len(series)), np.nan)
+    jugado = ~(np.isnan(gl) | np.isnan(gv))
+    for j, clave in enumerate(zip(series['Mercado'], series['Lado'])):
+        if clave in resultado:
+            salida[jugado, j] = resultado[clave][jugado]
+    return salida
+
+
+def lineas_iguales(df, series):
+    """Máscara (partidos x series): en el hándicap asiático sólo es comparable si la línea no se movió."""
+    mascara = np.ones((len(df), len(series)), dtype=bool)
+    if {'AHh', 'AHCh'} <= set(df.columns):
+        misma = (pd.to_numeric(df['AHh'], errors='coerce') == pd.to_numeric(df['AHCh'], errors='coerce')).to_numpy()
+        mascara[:, (series['Mercado'] == 'Handicap_Asiatico').to_numpy()] = misma[:, None]
+    return mascara
+
+# --- CÁLCULO VECTORIZADO ---
+
+def calcular_clv(df, series, casa_referencia=CASA_REFERENCIA):
+    """
+    Matrices (partidos x series) de:
+      CLV: cuota_apertura / cuota_cierre - 1 (> 0 = se batió el cierre)
+      Deriva: prob. sin margen al cierre - en apertura (cuánto se movió el mercado)
+      Edge: prob. justa de cierre de la casa de referencia x cuota_apertura - 1
+      Retorno_Apertura / Retorno_Cierre: beneficio por unidad apostada a cada precio
+    """
+    apertura, cierre = matrices_cuotas(df, series)
+    validas = lineas_iguales(df, series) & ~np.isnan(apertura) & ~np.isnan(cierre)
+    apertura = np.where(validas, apertura, np.nan)
+    cierre = np.where(validas, cierre, np.nan)
+
+    p_apertura = probabilidades_sin_margen(apertura, series)
+    p_cierre = probabilidades_sin_margen(cierre, series)
+
+    # Referencia por (Mercado, Lado): la columna de la casa de referencia, repetida para todas las casas
+    claves = (series['Mercado'] + '|' + series['Lado']).to_numpy()
+    es_ref = (series['Casa'] == casa_referencia).to_numpy()
+    col_ref = {clave: j for j, clave in enumerate(claves) if es_ref[j]}
+    indice_ref = np.array([col_ref.get(clave, -1) for clave in claves])
+    p_ref = np.where(indice_ref >= 0, p_cierre[:, np.maximum(indice_ref, 0)], np.nan)
+
+    gana = resultados_series(df, series)
+    matrices = {
+        'CLV': apertura / cierre - 1,
+        'Deriva': p_cierre - p_apertura,
+        'Edge': p_ref * apertura - 1,
+        'Retorno_Apertura': gana * apertura - 1,
+        'Retorno_Cierre': gana * cierre - 1,
+    }
+    return matrices
+
+
+def resumir_clv(series, matrices, percentiles=PERCENTILES_EDGE):
+    """Resumen por serie (casa x mercado x lado) con reducciones por columna, sin bucles por partido."""
+    resumen = series[['Mercado', 'Casa', 'Lado']].copy()
+    clv = matrices['CLV']
+    n = np.sum(~np.isnan(clv), axis=0)
+    resumen['N'] = n
+
+    # Series sin datos en algún partido o casa: las medias de columnas todo-NaN se descartan al final
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        resumen['CLV_Media'] = np.nanmean(clv, axis=0)
+        resumen['CLV_Mediana'] = np.nanmedian(clv, axis=0)
+        resumen['Pct_CLV_Positivo'] = np.nansum(clv > 0, axis=0) / np.maximum(n, 1) * 100
+        resumen['Deriva_Media'] = np.nanmean(matrices['Deriva'], axis=0)
+        resumen['Deriva_Abs_Media'] = np.nanmean(np.abs(matrices['Deriva']), axis=0)
+        resumen['Edge_Media'] = np.nanmean(matrices['Edge'], axis=0)
+        for p, valores in zip(percentiles, np.nanpercentile(matrices['Edge'], percentiles, axis=0)):
+            resumen[f'Edge_P{p:02d}'] = valores
+        resumen['Retorno_Apertura'] = np.nanmean(matrices['Retorno_Apertura'], axis=0)
+        resumen['Retorno_Cierre'] = np.nanmean(matrices['Retorno_Cierre'], axis=0)
+
+    return resumen[resumen['N'] > 0].sort_values(by=['Mercado', 'Casa', 'Lado']).reset_index(drop=True)
+
+
+def resumir_por_casa(series, matrices):
+    """CLV medio y % positivo por (mercado, casa), juntando todos los lados."""
+    grupos = series['Mercado'] + '|' + series['Casa']
+    filas = []
+    for grupo, columnas in grupos.groupby(grupos).groups.items():
+        if np.all(np.isnan(matrices['CLV'][:, grupos.index.get_indexer(columnas)])):
+            continue
+        j = grupos.index.get_indexer(columnas)
+        clv = matrices['CLV'][:, j].ravel()
+        clv = clv[~np.isnan(clv)]
+        mercado, casa = grupo.split('|')
+        filas.append({'Mercado': mercado, 'Casa': casa, 'N': len(clv), 'CLV_Media': clv.mean(),
+                      'Pct_CLV_Positivo': np.mean(clv > 0) * 100,
+                      'Deriva_Abs_Media': np.nanmean(np.abs(matrices['Deriva'][:, j]))})
+    return pd.DataFrame(filas).sort_values(by=['Mercado', 'CLV_Media'], ascending=[True, False]).reset_index(drop=True)
+
+# --- EJECUCIÓN DEL SCRIPT ---
+
+def analizar_clv(raw_path, output_path):
+    t0 = time.perf_counter()
+    try:
+        df = cargar_archivo_cuotas(raw_path)
+    except FileNotFoundError as e:
+        print(f"🚨 ERROR: {e}")
+        return None
+    t_carga = time.perf_counter() - t0
+
+    series = detectar_series(df.columns)
+
+    t0 = time.perf_counter()
+    matrices = calcular_clv(df, series)
+    df_resumen = resumir_clv(series, matrices)
+    t_calculo = time.perf_counter() - t0
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    df_resumen.to_csv(output_path, index=False)
+
+    print("\n" + "="*80)
+    print(f"      📉 CLOSING LINE VALUE: {len(df)} partidos | {df['Archivo'].nunique()} archivos | "
+          f"{len(series)} series (casa x mercado x lado)")
+    print(f"      Carga: {t_carga:.2f} s | Cálculo: {t_calculo * 1000:.1f} ms | Referencia: {CASA_REFERENCIA}")
+    print("="*80)
+    print(resumir_por_casa(series, matrices).round(4).to_string(index=False))
+    print(f"\nResumen por casa, mercado y lado guardado en: {output_path.name}")
+    return df_resumen
+
+
+if __name__ == "__main__":
+    argumentos = [a for a in sys.argv[1:] if not a.startswith('--')]
+    raw_path = Path(argumentos[0]) if argumentos else DATOS_RAW_PATH
+    analizar_clv(raw_path, OUTPUT_CLV_PATH)
@@ -3,6 +3,8 @@ import numpy as np
 from pathlib import Path
 from scipy.stats import poisson
 
+from indice_asof import calcular_metricas_asof, construir_indice_asof
+
 # --- CONFIGURACIÓN DE RUTAS ---
 BASE_DIR = Path(__file__).resolve().parent
 # Retrocede un directorio desde '01_scripts' para llegar a la raíz del proyecto
@@ -13,11 +15,11 @@ BASE_CONSOLIDADA_PATH = PROYECTO_ROOT / '03_Datos_Limpios' / 'premier_league_BAS
 
 # --- COEFICIENTES DEL MODELO POISSON V6.0 ---
 COEFS_V6 = {
-    'Local_CORNERS_AF_AVG': 0.0098, 'Local_CORNERS_EC_AVG': 0.0172,
-    'Visitante_CORNERS_AF_AVG': 0.0172, 'Visitante_CORNERS_EC_AVG': 0.0098,
-    'Local_ST_AF_AVG': 0.0052, 'Local_ST_EC_AVG': 0.0011,
-    'Visitante_ST_AF_AVG': 0.0011, 'Visitante_ST_EC_AVG': 0.0052,
-    'FACTOR_LOCAL': 1.8835
+    'Local_CORNERS_AF_AVG': -0.0002, 'Local_CORNERS_EC_AVG': 0.0075,
+    'Visitante_CORNERS_AF_AVG': 0.0075, 'Visitante_CORNERS_EC_AVG': -0.0002,
+    'Local_ST_AF_AVG': 0.0110, 'Local_ST_EC_AVG': 0.0118,
+    'Visitante_ST_AF_AVG': 0.0118, 'Visitante_ST_EC_AVG': 0.0110,
+    'FACTOR_LOCAL': 1.6664
 }
 
 # --- PARÁMETROS DE CÁLCULO ---
@@ -27,33 +29,6 @@ UMBRALES_ENTEROS = [7, 8, 9, 10, 11, 12] # Umbrales X.5 a revisar (de 7.5 a 12.5
 
 # --- FUNCIONES BASE DEL MODELO V6.0 ---
 
-def calcular_promedios_instantaneos(df_historial, equipo, metrica, N):
-    """Calcula el promedio móvil FINAL (previo al partido) para un equipo, basado en N partidos."""
-    
-    df_equipo_calc = df_historial[(df_historial['Local'] == equipo) | (df_historial['Visitante'] == equipo)].copy()
-
-    if df_equipo_calc.empty:
-        # Manejo de equipos sin historial
-        return {f'{metrica}_AF_AVG': np.nan, f'{metrica}_EC_AVG': np.nan}
-
-    if metrica == 'HC':
-        col_home, col_away = 'HC', 'AC'
-    else:
-        col_home, col_away = metrica + '_H', metrica + '_A'
-    
-    # Calcular AF (Atacando/A favor) y EC (En contra) para cada partido
-    af = np.where(df_equipo_calc['Local'] == equipo, df_equipo_calc[col_home], df_equipo_calc[col_away])
-    ec = np.where(df_equipo_calc['Local'] == equipo, df_equipo_calc[col_away], df_equipo_calc[col_home])
-    
-    af_series, ec_series = pd.Series(af), pd.Series(ec)
-    
-    # Aplicar promedio móvil .shift(1) para usar el promedio ANTES del partido.
-    avg_af = af_series.shift(1).rolling(window=N, min_periods=1).mean().iloc[-1]
-    avg_ec = ec_series.shift(1).rolling(window=N, min_periods=1).mean().iloc[-1]
-
-    return {f'{metrica}_AF_AVG': avg_af, f'{metrica}_EC_AVG': avg_ec}
-
-
 def calcular_lambda(row):
     """Calcula la Tasa de Córners Esperada (lambda) para un partido usando el Modelo Poisson."""
     
@@ -77,34 +52,31 @@ def calcular_lambda(row):
 
 # --- FUNCIÓN PRINCIPAL DE PREDICCIÓN (Adaptada para un solo partido) ---
 
-def predecir_partido_unico(local, visitante):
-    """Calcula el Lambda y todas las PM para un solo partido."""
+def predecir_partido_unico(local, visitante, fecha=None):
+    """
+    Calcula el Lambda y todas las PM para un solo partido. Con 'fecha' se usa la forma
+    previa a esa fecha (re-preciar partidos pasados sin ver filas futuras); sin ella,
+    la forma al final del historial.
+    """
     try:
         df_historial = pd.read_csv(BASE_CONSOLIDADA_PATH)
         # Aseguramos que las columnas sean las esperadas por el modelo V6.0
         df_historial.columns = ['Fecha', 'Local', 'Visitante', 'Resultado_Final', 
                                 'HC', 'AC', 'ST_H', 'ST_A', 'FT_H', 'FT_A', 'OFF_H', 'OFF_A',
                                 'Total_Tiros', 'Total_Tiros_Libres', 'Total_Offsides', 'Total_Corners'] 
-        df_historial['Fecha'] = pd.to_datetime(df_historial['Fecha']).sort_values()
+        df_historial['Fecha'] = pd.to_datetime(df_historial['Fecha'])
+        df_historial = df_historial.sort_values(by='Fecha', kind='stable').reset_index(drop=True)
     except Exception as e:
         print(f"🚨 ERROR al cargar la base consolidada: {e}")
         return None
 
-    # 1. Calcular Métricas para ambos equipos
-    c_local = calcular_promedios_instantaneos(df_historial, local, 'HC', N_CORNERS)
-    st_local = calcular_promedios_instantaneos(df_historial, local, 'ST', N_ST)
-    c_visitante = calcular_promedios_instantaneos(df_historial, visitante, 'HC', N_CORNERS)
-    st_visitante = calcular_promedios_instantaneos(df_historial, visitante, 'ST', N_ST)
-    
-    metricas = {
-        'Local': [local], 'Visitante': [visitante],
-        'Local_CORNERS_AF_AVG': c_local['HC_AF_AVG'], 'Local_CORNERS_EC_AVG': c_local['HC_EC_AVG'],
-        'Visitante_CORNERS_AF_AVG': c_visitante['HC_AF_AVG'], 'Visitante_CORNERS_EC_AVG': c_visitante['HC_EC_AVG'],
-        'Local_ST_AF_AVG': st_local['ST_AF_AVG'], 'Local_ST_EC_AVG': st_local['ST_EC_AVG'],
-        'Visitante_ST_AF_AVG': st_visitante['ST_AF_AVG'], 'Visitante_ST_EC_AVG': st_visitante['ST_EC_AVG'],
-        'FACTOR_LOCAL': 1.0 
-    }
-    df_prediccion = pd.DataFrame(metricas)
+    # 1. Calcular Métricas para ambos equipos (índice as-of: sólo partidos anteriores a 'fecha')
+    if fecha is None:
+        # Un instante después del último partido registrado
+        fecha = df_historial['Fecha'].max() + pd.Timedelta(days=1)
+    indice = construir_indice_asof(df_historial)
+    partido = pd.DataFrame({'Fecha': [pd.Timestamp(fecha)], 'Local': [local], 'Visitante': [visitante]})
+    df_prediccion = calcular_metricas_asof(indice, partido, N_CORNERS, N_ST).drop(columns=['Fecha'])
 
     # 2. Calcular Lambda
     df_prediccion['Lambda'] = df_prediccion.apply(calcular_lambda, axis=1)
@@ -206,8 +178,17 @@ if __name__ == "__main__":
         print("🚫 Debes ingresar ambos nombres de equipo.")
         exit()
 
+    # Fecha opcional: permite re-preciar un partido pasado con la forma que había entonces
+    fecha = input("Fecha del partido AAAA-MM-DD (Enter = próximo partido): ").strip() or None
+    if fecha is not None:
+        try:
+            fecha = pd.to_datetime(fecha, format='%Y-%m-%d')
+        except ValueError:
+            print(f"🚫 Fecha no válida: '{fecha}'. Usa el formato AAAA-MM-DD (ej: 2024-03-16).")
+            exit()
+
     # 2. Calcular probabilidades (Lambda y PM)
-    probabilidades = predecir_partido_unico(local, visitante)
+    probabilidades = predecir_partido_unico(local, visitante, fecha)
     
     if probabilidades is None:
         print("\n🚫 Proceso abortado debido a errores en la predicción.")
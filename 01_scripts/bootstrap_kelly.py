@@ -0,0 +1,235 @@
+import os
+import sys
+import time
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from scipy.stats import poisson
+
+from calibracion_probabilidades import CALIBRACION_PATH, cargar_calibracion, evaluar_mapa
+from carga_jornadas import FIXTURES_PATH, _cargar_modulo, cargar_fixtures
+from indice_asof import calcular_metricas_asof, cargar_historial, construir_indice_asof
+from kelly_vectorizado import COLUMNAS_PROB, ETIQUETAS, fraccion_kelly, matriz_cuotas
+from modelo_conteo_corners import X_COLS, Y_COL, ajustar_poisson_irls
+
+# --- CONFIGURACIÓN DE RUTAS ---
+BASE_DIR = Path(__file__).resolve().parent
+PROYECTO_ROOT = BASE_DIR.parent
+
+BASE_MODELADO_PATH = PROYECTO_ROOT / '03_Datos_Limpios' / 'premier_league_BASE_V6_C5_ST10_FINAL.csv'
+BASE_CONSOLIDADA_PATH = PROYECTO_ROOT / '03_Datos_Limpios' / 'premier_league_BASE_CONSOLIDADA.csv'
+CUOTAS_PATH = PROYECTO_ROOT / '04_Modelos_Entrenados' / 'cuotas_jornada.csv'
+OUTPUT_INTERVALOS_PATH = PROYECTO_ROOT / '04_Modelos_Entrenados' / 'intervalos_bootstrap_V6.csv'
+# Los intervalos se centran en el modelo que fija los precios (COEFS_V6 de este script)
+RUTA_PREDICCION = BASE_DIR / '03_prediccion_jornada.py'
+
+# --- PARÁMETROS DEL BOOTSTRAP ---
+N_CORNERS = 5
+N_ST = 10
+UMBRALES_ENTEROS = [7, 8, 9, 10, 11, 12]
+N_REPLICAS = 1000
+REPLICAS_POR_TAREA = 50 # Réplicas que ajusta cada tarea del pool (reparte la carga y limita el IPC)
+PERCENTILES = (5, 95)   # Intervalo del 90%
+SEMILLA = 2024
+
+# --- MATRIZ COMPARTIDA ENTRE PROCESOS ---
+# Cada trabajador abre el mismo bloque de memoria compartida (X | y) en lugar de recibir una copia
+
+_COMPARTIDO = {}
+
+
+def _iniciar_trabajador(nombre_memoria, forma):
+    memoria = shared_memory.SharedMemory(name=nombre_memoria)
+    datos = np.ndarray(forma, dtype=np.float64, buffer=memoria.buf)
+    _COMPARTIDO.update(memoria=memoria, X=datos[:, :-1], y=datos[:, -1])
+
+
+def _ajustar_replicas(semilla, n_replicas, beta_inicial):
+    """
+    Ajusta 'n_replicas' réplicas bootstrap. Remuestrear con reemplazo equivale a ponderar cada
+    partido por el número de veces que sale elegido (pesos multinomiales), así que no se copian filas.
+    """
+    X, y = _COMPARTIDO['X'], _COMPARTIDO['y']
+    rng = np.random.default_rng(semilla)
+    n = len(y)
+    betas = np.empty((n_replicas, X.shape[1]))
+    for i in range(n_replicas):
+        pesos = np.bincount(rng.integers(0, n, n), minlength=n).astype(float)
+        betas[i] = ajustar_poisson_irls(X, y, beta_inicial=beta_inicial, pesos=pesos)
+    return betas
+
+
+def coeficientes_bootstrap(X, y, beta_centro=None, n_replicas=N_REPLICAS, semilla=SEMILLA, max_procesos=None,
+                           replicas_por_tarea=REPLICAS_POR_TAREA):
+    """
+    Reajusta el GLM Poisson sobre 'n_replicas' muestras bootstrap en un pool de procesos.
+    Con 'beta_centro' (los coeficientes que fijan los precios) cada réplica se desplaza
+    beta_centro - beta_completo: la dispersión es la del bootstrap y el centro el modelo de producción.
+    Devuelve (beta_centro, betas) con betas de forma (n_replicas, n_coeficientes).
+    """
+    datos = np.column_stack([X, y]).astype(np.float64)
+    beta_completo = ajustar_poisson_irls(X, y)
+
+    # Semillas independientes por tarea: el resultado no depende del número de procesos
+    tamanos = [min(replicas_por_tarea, n_replicas - i) for i in range(0, n_replicas, replicas_por_tarea)]
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos))
+
+    memoria = shared_memory.SharedMemory(create=True, size=datos.nbytes)
+    try:
+        np.ndarray(datos.shape, dtype=np.float64, buffer=memoria.buf)[:] = datos
+        with ProcessPoolExecutor(max_workers=max_procesos or os.cpu_count(), initializer=_iniciar_trabajador,
+                                 initargs=(memoria.name, datos.shape)) as pool:
+            bloques = list(pool.map(_ajustar_replicas, semillas, tamanos, [beta_completo] * len(tamanos)))
+    finally:
+        memoria.close()
+        memoria.unlink()
+
+    betas = np.vstack(bloques)
+    if beta_centro is None:
+        return beta_completo, betas
+    beta_centro = np.asarray(beta_centro, dtype=float)
+    return beta_centro, betas + (beta_centro - beta_completo)
+
+# --- INTERVALOS POR PARTIDO ---
+
+def distribucion_probabilidades(X_partidos, betas, umbrales=UMBRALES_ENTEROS, calibracion=None):
+    """
+    Lambdas (partidos x réplicas) y probabilidades Más/Menos X.5 (partidos x réplicas x mercados),
+    con los mercados en el orden de 'kelly_vectorizado.COLUMNAS_PROB'. Con 'calibracion' se aplica
+    el mismo mapa que en '03_prediccion_jornada.py' (creciente: los percentiles se conservan).
+    """
+    lambdas = np.exp(np.asarray(X_partidos, dtype=float) @ np.atleast_2d(betas).T)
+    u = np.asarray(umbrales, dtype=float)
+    prob_mas = poisson.sf(u, lambdas[:, :, None])
+    if calibracion is not None:
+        for j, X in enumerate(umbrales):
+            if str(X) in calibracion['umbrales']:
+                prob_mas[:, :, j] = evaluar_mapa(prob_mas[:, :, j], calibracion, X)
+    return lambdas, np.concatenate([prob_mas, 1.0 - prob_mas], axis=2)
+
+
+def resumir_intervalos(df_partidos, lambda_puntual, lambdas, prob_puntual, probs, percentiles=PERCENTILES):
+    """Tabla por partido: Lambda y probabilidades del modelo de producción, con su intervalo bootstrap."""
+    bajo, alto = percentiles
+    resultado = df_partidos[['Fecha', 'Local', 'Visitante']].reset_index(drop=True).copy()
+    resultado['Lambda'] = lambda_puntual
+    resultado[f'Lambda_P{bajo:02d}'] = np.percentile(lambdas, bajo, axis=1)
+    resultado[f'Lambda_P{alto:02d}'] = np.percentile(lambdas, alto, axis=1)
+
+    p_bajo = np.percentile(probs, bajo, axis=1)
+    p_alto = np.percentile(probs, alto, axis=1)
+    for j, col in enumerate(COLUMNAS_PROB):
+        resultado[col] = prob_puntual[:, j]
+        resultado[f'{col}_P{bajo:02d}'] = p_bajo[:, j]
+        resultado[f'{col}_P{alto:02d}'] = p_alto[:, j]
+    return resultado
+
+# --- KELLY CON INCERTIDUMBRE ---
+
+def kelly_contraido(p, p_desv, c):
+    """
+    Kelly sobre la probabilidad del modelo, contraído por su incertidumbre:
+    f* = f(p) * edge^2 / (edge^2 + c^2 * sigma_p^2), con edge = p*c - 1.
+    Sin incertidumbre (sigma_p = 0) coincide con Kelly; si el edge es ruido, tiende a 0.
+    """
+    f = fraccion_kelly(p, c)
+    edge = p * c - 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        factor = np.where(edge > 0, edge ** 2 / (edge ** 2 + (c * p_desv) ** 2), 0.0)
+    return f, f * factor
+
+
+def tabla_kelly_bootstrap(df_partidos, prob_puntual, probs, df_cuotas):
+    """
+    Apuestas con Kelly > 0 sobre las probabilidades de producción (las mismas que
+    '03_prediccion_jornada.py'), con su fracción contraída por la desviación bootstrap.
+    """
+    partidos = pd.Index(df_partidos['Local'] + ' vs ' + df_partidos['Visitante'], name='Partido')
+    cuotas = matriz_cuotas(df_cuotas).reindex(partidos)
+    C = cuotas.to_numpy()
+    p_desv = probs.std(axis=1, ddof=1)
+
+    F, F_contraida = kelly_contraido(prob_puntual, p_desv, C)
+    filas, cols = np.nonzero(F > 0)
+    return pd.DataFrame({
+        'Partido': partidos.to_numpy()[filas],
+        'Umbral': ETIQUETAS[cols],
+        'Cuota': C[filas, cols],
+        'Prob_Modelo': prob_puntual[filas, cols],
+        'Prob_Desv': p_desv[filas, cols],
+        'Fraccion_Kelly': F[filas, cols],
+        'Kelly_Contraida': F_contraida[filas, cols],
+        'Kelly_Media': F_contraida[filas, cols] / 2,
+    }).sort_values(by='Kelly_Media', ascending=False).reset_index(drop=True)
+
+# --- EJECUCIÓN ---
+
+def ejecutar_bootstrap(base_path, consolidada_path, fixtures_path, output_path, modelo, n_replicas=N_REPLICAS):
+    try:
+        df_base = pd.read_csv(base_path).dropna(subset=X_COLS + [Y_COL])
+        df_historial = cargar_historial(consolidada_path)
+        jornada_df = cargar_fixtures(fixtures_path)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"\n🚨 ERROR al cargar los datos: {e}")
+        return None, None, None
+
+    X = df_base[X_COLS].to_numpy(dtype=float)
+    y = df_base[Y_COL].to_numpy(dtype=float)
+    beta_modelo = np.array([modelo['coefs'][col] for col in X_COLS])
+
+    t0 = time.perf_counter()
+    beta_modelo, betas = coeficientes_bootstrap(X, y, beta_modelo, n_replicas)
+    duracion = time.perf_counter() - t0
+
+    # Métricas de cada partido a su fecha (mismo índice as-of que '03_prediccion_jornada.py')
+    indice = construir_indice_asof(df_historial)
+    df_metricas = calcular_metricas_asof(indice, jornada_df, N_CORNERS, N_ST)
+    X_partidos = df_metricas[X_COLS].to_numpy(dtype=float)
+
+    calibracion = cargar_calibracion(CALIBRACION_PATH)
+    lambda_puntual, prob_puntual = distribucion_probabilidades(X_partidos, beta_modelo, calibracion=calibracion)
+    lambdas, probs = distribucion_probabilidades(X_partidos, betas, calibracion=calibracion)
+    prob_puntual = prob_puntual[:, 0, :]
+    df_intervalos = resumir_intervalos(df_metricas, lambda_puntual[:, 0], lambdas, prob_puntual, probs)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    df_intervalos.to_csv(output_path, index=False)
+
+    print("\n" + "="*80)
+    print(f"      🎲 BOOTSTRAP POISSON V6.0: {n_replicas} réplicas en {duracion:.2f} s "
+          f"({os.cpu_count()} procesos)")
+    print("      Intervalos centrados en COEFS_V6 (el modelo de '03_prediccion_jornada.py')")
+    print("="*80)
+    if calibracion is not None:
+        print(f"🎯 Probabilidades calibradas con: {CALIBRACION_PATH.name} ({calibracion['metodo']})")
+    bajo, alto = PERCENTILES
+    print(df_intervalos[['Local', 'Visitante', 'Lambda', f'Lambda_P{bajo:02d}', f'Lambda_P{alto:02d}']]
+          .round(3).to_string(index=False))
+    print(f"\nIntervalos guardados en: {output_path.name}")
+    return df_metricas, prob_puntual, probs
+
+
+if __name__ == "__main__":
+    fixtures_path = Path(sys.argv[1]) if len(sys.argv) > 1 else FIXTURES_PATH
+    prediccion = _cargar_modulo('prediccion_jornada', RUTA_PREDICCION)
+    df_partidos, prob_puntual, probs = ejecutar_bootstrap(BASE_MODELADO_PATH, BASE_CONSOLIDADA_PATH, fixtures_path,
+                                                          OUTPUT_INTERVALOS_PATH, prediccion.MODELO_V6)
+    if df_partidos is None:
+        exit()
+
+    try:
+        df_cuotas = pd.read_csv(CUOTAS_PATH)
+    except FileNotFoundError:
+        print(f"\n⚠️ Sin cuotas ({CUOTAS_PATH.name}): no se calcula Kelly.")
+        exit()
+
+    df_kelly = tabla_kelly_bootstrap(df_partidos, prob_puntual, probs, df_cuotas)
+    print("\n" + "="*80)
+    print("      ⚙️ KELLY CONTRAÍDO POR INCERTIDUMBRE DEL MODELO")
+    print("="*80)
+    if df_kelly.empty:
+        print("⚠️ No se encontró ninguna apuesta con valor positivo (Kelly > 0) en los umbrales analizados.")
+    else:
+        print(df_kelly.round(4).to_string(index=False))
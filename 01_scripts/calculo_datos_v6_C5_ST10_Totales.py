@@ -45,9 +45,9 @@ def calcular_promedios_moviles(df, equipo, metrica, N):
     }).set_index('Index')
 
 
-def generar_base_modelado(base_path, output_path):
-    # Cargar Base Consolidada
-    df = pd.read_csv(base_path)
+def construir_base_modelado(df, n_corners=N_CORNERS, n_st=N_ST):
+    """Calcula las métricas V6 a partir de la base consolidada (en memoria). Devuelve la base de modelado."""
+    df = df.copy()
 
     # Renombrar columnas
     df.columns = ['Fecha', 'Local', 'Visitante', 'Resultado_Final', 
@@ -60,8 +60,8 @@ def generar_base_modelado(base_path, output_path):
     equipos = pd.concat([df['Local'], df['Visitante']]).unique()
     
     # 1. Calcular las métricas por equipo
-    metricas_c = [calcular_promedios_moviles(df, equipo, 'HC', N_CORNERS) for equipo in equipos]
-    metricas_st = [calcular_promedios_moviles(df, equipo, 'ST', N_ST) for equipo in equipos]
+    metricas_c = [calcular_promedios_moviles(df, equipo, 'HC', n_corners) for equipo in equipos]
+    metricas_st = [calcular_promedios_moviles(df, equipo, 'ST', n_st) for equipo in equipos]
 
     # -----------------------------------------------------------
     # CONSOLIDACIÓN Y MERGE POR ÍNDICE
@@ -108,8 +108,16 @@ def generar_base_modelado(base_path, output_path):
     # Aquí es donde se eliminan los primeros N partidos sin datos previos (lo normal).
     df_final = df_modelado.dropna(subset=columnas_modelo_final_v6).copy()
     
+    # Base lista para modelar (con 'Fecha' para ponderar/ventanear por tiempo)
+    return df_final[['Fecha'] + columnas_modelo_final_v6].reset_index(drop=True)
+
+
+def generar_base_modelado(base_path, output_path):
+    # Cargar Base Consolidada
+    df_final = construir_base_modelado(pd.read_csv(base_path))
+
     # Guardar el archivo listo para modelar
-    df_final[columnas_modelo_final_v6].to_csv(output_path, index=False)
+    df_final.to_csv(output_path, index=False)
     
     print("\n" + "="*80)
     print("      ✅ CÁLCULO DE MÉTRICAS V6.0 COMPLETADO (¡Listo para Modelar!)")
@@ -0,0 +1,245 @@
+import json
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+from carga_jornadas import _cargar_modulo
+from indice_asof import N_CORNERS, N_ST, calcular_metricas_asof, cargar_historial, construir_indice_asof
+from modelo_conteo_corners import X_COLS, puntuar_lote
+from pesos_temporales import PASO_DIAS
+
+# --- CONFIGURACIÓN DE RUTAS ---
+BASE_DIR = Path(__file__).resolve().parent
+PROYECTO_ROOT = BASE_DIR.parent
+
+BASE_CONSOLIDADA_PATH = PROYECTO_ROOT / '03_Datos_Limpios' / 'premier_league_BASE_CONSOLIDADA.csv'
+# El mapa calibra el predictor de producción: COEFS_V6 de este script con métricas as-of
+RUTA_PREDICCION = BASE_DIR / '03_prediccion_jornada.py'
+# Se guarda junto al modelo para que '03_prediccion_jornada.py' lo aplique automáticamente
+CALIBRACION_PATH = PROYECTO_ROOT / '04_Modelos_Entrenados' / 'calibracion_V6.json'
+
+# --- PARÁMETROS DE CALIBRACIÓN ---
+UMBRALES_ENTEROS = [7, 8, 9, 10, 11, 12]
+METODO = 'isotonica' # 'isotonica' o 'platt'
+PUNTOS_TABLA = 201   # Resolución de la tabla de interpolación en [0, 1] (Platt)
+BLOQUES_EVALUACION = 3 # Últimos bloques de PASO_DIAS días reservados para medir el Brier fuera de muestra
+MIN_PARTIDOS_BLOQUE = 20 # Tamaño mínimo de cada escalón isotónico
+PROB_MIN, PROB_MAX = 0.001, 0.999 # Evita probabilidades extremas que disparen Kelly
+
+# --- PREDICCIONES HISTÓRICAS DEL MODELO DE PRODUCCIÓN ---
+
+def generar_predicciones_historicas(df_historial, modelo, umbrales=UMBRALES_ENTEROS):
+    """
+    Probabilidades Más X.5 del modelo de producción para cada partido del historial, con las
+    métricas as-of previas a su fecha (las mismas que se usan al predecir una jornada).
+    Devuelve (prob_mas, resultado, bloque) en orden cronológico; 'bloque' numera tramos de
+    PASO_DIAS días. Se descartan los partidos de equipos aún sin historial.
+    """
+    indice = construir_indice_asof(df_historial)
+    df_metricas = calcular_metricas_asof(indice, df_historial, N_CORNERS, N_ST)
+    validos = df_metricas[X_COLS].notna().all(axis=1).to_numpy()
+
+    df_prob = puntuar_lote(df_metricas[validos], modelo, umbrales)
+    prob_mas = df_prob[[f'Prob_MAS_{X}_5' for X in umbrales]].to_numpy()
+    total = (df_historial['HC'] + df_historial['AC']).to_numpy(dtype=float)[validos]
+    resultado = (total[:, None] > np.asarray(umbrales)[None, :]).astype(float)
+
+    dias = df_historial['Fecha'].to_numpy()[validos].astype('datetime64[D]').astype(np.int64)
+    return prob_mas, resultado, (dias - dias[0]) // PASO_DIAS
+
+# --- MAPAS DE CALIBRACIÓN ---
+
+def ajustar_isotonica(p, y, min_partidos=MIN_PARTIDOS_BLOQUE):
+    """
+    Regresión isotónica (Pool Adjacent Violators) como función escalonada.
+    Devuelve (x_min, x_max, medias): cada bloque vale 'medias[k]' en todo [x_min[k], x_max[k]].
+    """
+    # Los empates en p van siempre al mismo bloque (si no, un mismo x tendría dos valores)
+    x, inversa = np.unique(p, return_inverse=True)
+    pesos_x = np.bincount(inversa).astype(float)
+    medias_x = np.bincount(inversa, weights=y) / pesos_x
+
+    medias, pesos, x_min, x_max = [], [], [], []
+    for xi, mi, wi in zip(x, medias_x, pesos_x):
+        medias.append(mi)
+        pesos.append(wi)
+        x_min.append(xi)
+        x_max.append(xi)
+        # Fusionar bloques mientras se viole la monotonía
+        while len(medias) > 1 and medias[-2] > medias[-1]:
+            w = pesos[-2] + pesos[-1]
+            medias[-2] = (medias[-2] * pesos[-2] + medias[-1] * pesos[-1]) / w
+            x_max[-2] = x_max[-1]
+            pesos[-2] = w
+            medias.pop(); pesos.pop(); x_min.pop(); x_max.pop()
+
+    # Los bloques con pocos partidos (típicos en los extremos) se funden con su vecino más
+    # pequeño: la media de 1-2 partidos da probabilidades de 0 o 1 que dispararían Kelly.
+    # La media fundida queda entre las dos originales, así que el mapa sigue siendo creciente
+    k = 0
+    while len(medias) > 1 and k < len(medias):
+        if pesos[k] >= min_partidos:
+            k += 1
+            continue
+        vecino = k + 1 if k == 0 or (k + 1 < len(medias) and pesos[k + 1] < pesos[k - 1]) else k - 1
+        a, b = min(k, vecino), max(k, vecino)
+        w = pesos[a] + pesos[b]
+        medias[a] = (medias[a] * pesos[a] + medias[b] * pesos[b]) / w
+        x_max[a] = x_max[b]
+        pesos[a] = w
+        del medias[b], pesos[b], x_min[b], x_max[b]
+        k = a
+
+    return np.array(x_min), np.array(x_max), np.array(medias)
+
+
+def ajustar_platt(p, y, max_iter=50):
+    """Escalado de Platt sobre el logit de la probabilidad del modelo. Devuelve (a, b)."""
+    p = np.clip(p, 1e-6, 1 - 1e-6)
+    Z = np.column_stack([np.log(p / (1 - p)), np.ones_like(p)])
+    coef = np.array([1.0, 0.0])
+    for _ in range(max_iter):
+        q = 1.0 / (1.0 + np.exp(-(Z @ coef)))
+        w = q * (1 - q)
+        paso = np.linalg.solve(Z.T @ (Z * w[:, None]) + 1e-9 * np.eye(2), Z.T @ (y - q))
+        coef += paso
+        if np.max(np.abs(paso)) < 1e-10:
+            break
+    return coef
+
+
+def construir_tabla(p, y, metodo=METODO, puntos=PUNTOS_TABLA):
+    """
+    Tabla de consulta (x, valores) del mapa de calibración, para evaluar con np.interp.
+    Isotónica: los extremos de cada bloque con su media (plana dentro del bloque, lineal solo
+    entre bloques). Platt: la curva evaluada en una rejilla fija de [0, 1].
+    """
+    if metodo == 'isotonica':
+        x_min, x_max, medias = ajustar_isotonica(p, y)
+        x = np.column_stack([x_min, x_max]).ravel()
+        valores = np.repeat(medias, 2)
+    elif metodo == 'platt':
+        a, b = ajustar_platt(p, y)
+        x = np.linspace(0.0, 1.0, puntos)
+        r = np.clip(x, 1e-6, 1 - 1e-6)
+        valores = 1.0 / (1.0 + np.exp(-(a * np.log(r / (1 - r)) + b)))
+    else:
+        raise ValueError(f"Método de calibración desconocido: {metodo}")
+    return x, np.clip(valores, PROB_MIN, PROB_MAX)
+
+
+def ajustar_calibracion(prob_mas, resultado, umbrales=UMBRALES_ENTEROS, metodo=METODO):
+    """Un mapa (tabla x -> valor) por umbral."""
+    calibracion = {'metodo': metodo, 'umbrales': {}}
+    for j, X in enumerate(umbrales):
+        x, valores = construir_tabla(prob_mas[:, j], resultado[:, j], metodo)
+        calibracion['umbrales'][str(X)] = {'x': x.tolist(), 'valores': valores.tolist()}
+    return calibracion
+
+
+def evaluar_mapa(p, calibracion, X):
+    """Probabilidad calibrada de 'p' con el mapa del umbral X (constante fuera del rango ajustado)."""
+    tabla = calibracion['umbrales'][str(X)]
+    return np.interp(p, tabla['x'], tabla['valores'])
+
+
+def tabla_brier(prob_mas, resultado, calibracion, umbrales=UMBRALES_ENTEROS):
+    """Brier de las probabilidades del modelo y de las calibradas, por umbral."""
+    filas = []
+    for j, X in enumerate(umbrales):
+        p_cal = evaluar_mapa(prob_mas[:, j], calibracion, X)
+        filas.append({
+            'Umbral': f'{X}.5',
+            'Frecuencia_MAS': resultado[:, j].mean(),
+            'Prob_Media_Raw': prob_mas[:, j].mean(),
+            'Brier_Raw': np.mean((prob_mas[:, j] - resultado[:, j]) ** 2),
+            'Brier_Calibrado': np.mean((p_cal - resultado[:, j]) ** 2),
+        })
+    return pd.DataFrame(filas)
+
+
+def guardar_calibracion(calibracion, output_path):
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump(calibracion, f)
+
+
+def cargar_calibracion(calibracion_path):
+    """Carga el mapa y lo deja en arrays de NumPy listos para interpolar (None si no existe)."""
+    try:
+        with open(calibracion_path) as f:
+            calibracion = json.load(f)
+    except FileNotFoundError:
+        return None
+    return {
+        'metodo': calibracion['metodo'],
+        'umbrales': {str(X): {'x': np.asarray(t['x']), 'valores': np.asarray(t['valores'])}
+                     for X, t in calibracion['umbrales'].items()},
+    }
+
+# --- APLICACIÓN EN PREDICCIÓN ---
+
+def aplicar_calibracion(df_probabilidades, calibracion):
+    """
+    Sustituye Prob_MAS_X_5 / Prob_MENOS_X_5 por sus valores calibrados mediante
+    interpolación en la tabla (una llamada a np.interp por umbral, todos los partidos a la vez).
+    """
+    df = df_probabilidades.copy()
+    for X in calibracion['umbrales']:
+        col_mas = f'Prob_MAS_{X}_5'
+        if col_mas not in df.columns:
+            continue
+        p_cal = evaluar_mapa(df[col_mas].to_numpy(dtype=float), calibracion, X)
+        df[col_mas] = p_cal
+        df[f'Prob_MENOS_{X}_5'] = 1.0 - p_cal
+    return df
+
+# --- EJECUCIÓN DEL SCRIPT ---
+
+def entrenar_calibracion(consolidada_path, output_path, modelo, metodo=METODO):
+    """
+    Ajusta el mapa con las predicciones históricas de 'modelo' y sólo guarda los umbrales cuyo
+    Brier mejora fuera de muestra (mapa ajustado sin los últimos bloques y medido sobre ellos).
+    """
+    try:
+        df_historial = cargar_historial(consolidada_path)
+    except FileNotFoundError:
+        print(f"\n🚨 ERROR: Archivo no encontrado en: {consolidada_path}")
+        return
+
+    prob_mas, resultado, bloque = generar_predicciones_historicas(df_historial, modelo)
+
+    # Brier fuera de muestra: el mapa se ajusta sin los últimos bloques y se mide sobre ellos
+    evaluacion = bloque > bloque.max() - BLOQUES_EVALUACION
+    if evaluacion.all():
+        print(f"\n🚨 ERROR: Hacen falta más de {BLOQUES_EVALUACION} bloques de {PASO_DIAS} días para evaluar.")
+        return
+    calibracion_previa = ajustar_calibracion(prob_mas[~evaluacion], resultado[~evaluacion], metodo=metodo)
+    df_evaluacion = tabla_brier(prob_mas[evaluacion], resultado[evaluacion], calibracion_previa)
+    mejora = (df_evaluacion['Brier_Calibrado'] < df_evaluacion['Brier_Raw']).to_numpy()
+    df_evaluacion['Se_Aplica'] = np.where(mejora, 'Sí', 'No')
+
+    print("\n" + "="*80)
+    print(f"      🎯 CALIBRACIÓN DE PROBABILIDADES ({metodo.upper()})")
+    print(f"      Predicciones históricas (COEFS_V6, métricas as-of): {len(prob_mas)} "
+          f"({evaluacion.sum()} reservadas en los últimos {BLOQUES_EVALUACION} bloques)")
+    print("="*80)
+    print("Brier fuera de muestra (mapa ajustado con los bloques anteriores):")
+    print(df_evaluacion.round(4).to_string(index=False))
+
+    if not mejora.any():
+        # Un mapa anterior se aplicaría automáticamente en '03_prediccion_jornada.py'
+        output_path.unlink(missing_ok=True)
+        print("\n⚠️ La calibración no mejora el Brier fuera de muestra en ningún umbral: no se guarda el mapa.")
+        return
+
+    # Mapa final con todas las predicciones, sólo para los umbrales que mejoran
+    umbrales = [X for X, m in zip(UMBRALES_ENTEROS, mejora) if m]
+    calibracion = ajustar_calibracion(prob_mas[:, mejora], resultado[:, mejora], umbrales, metodo)
+    guardar_calibracion(calibracion, output_path)
+    print(f"\n✅ Mapa guardado en: {output_path.name} (umbrales: {', '.join(f'{X}.5' for X in umbrales)})")
+
+
+if __name__ == "__main__":
+    prediccion = _cargar_modulo('prediccion_jornada', RUTA_PREDICCION)
+    entrenar_calibracion(BASE_CONSOLIDADA_PATH, CALIBRACION_PATH, prediccion.MODELO_V6)
@@ -0,0 +1,123 @@
+import importlib.util
+import re
+import pandas as pd
+from pathlib import Path
+
+# --- CONFIGURACIÓN DE RUTAS ---
+BASE_DIR = Path(__file__).resolve().parent
+PROYECTO_ROOT = BASE_DIR.parent
+
+# Fichero de partidos por defecto (una jornada o toda la temporada restante)
+FIXTURES_PATH = PROYECTO_ROOT / '04_Modelos_Entrenados' / 'jornada_futura.csv'
+
+RUTA_CONSOLIDACION = BASE_DIR / 'Consolidacion' / '00_consolidacion_datos.py'
+
+
+def _cargar_modulo(nombre, ruta):
+    """Importa un script por ruta (algunos nombres empiezan por dígito y no se pueden importar directamente)."""
+    spec = importlib.util.spec_from_file_location(nombre, ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+# El mismo mapeo de nombres que la consolidación (una sola definición), para que los partidos casen con el historial
+NAME_MAPPING = _cargar_modulo('consolidacion_datos', RUTA_CONSOLIDACION).NAME_MAPPING
+
+# Nombres alternativos de columnas aceptados en el CSV (formato football-data / inglés)
+COLUMNAS_ALTERNATIVAS = {
+    'Date': 'Fecha', 'DATE': 'Fecha', 'HomeTeam': 'Local', 'HOMETEAM': 'Local', 'Home': 'Local',
+    'AwayTeam': 'Visitante', 'AWAYTEAM': 'Visitante', 'Away': 'Visitante',
+}
+
+# "Local vs Visitante", "Local v Visitante" o "Local - Visitante" en el SUMMARY del calendario
+PATRON_PARTIDO = re.compile(r'^\s*(.+?)\s+(?:vs\.?|v|-|–)\s+(.+?)\s*$', re.IGNORECASE)
+
+# --- LECTORES ---
+
+def cargar_fixtures_csv(path):
+    """Lee un CSV con columnas Fecha, Local, Visitante (o Date, HomeTeam, AwayTeam)."""
+    df = pd.read_csv(path, encoding='utf-8-sig')
+    df = df.rename(columns=COLUMNAS_ALTERNATIVAS)
+    faltantes = {'Fecha', 'Local', 'Visitante'} - set(df.columns)
+    if faltantes:
+        raise ValueError(f"Faltan columnas en {Path(path).name}: {sorted(faltantes)}")
+    df = df[['Fecha', 'Local', 'Visitante']].copy()
+    # ISO (2025-10-04) tal cual; formato football-data (04/10/2025) con el día primero
+    es_iso = df['Fecha'].astype(str).str.match(r'^\d{4}-').all()
+    df['Fecha'] = pd.to_datetime(df['Fecha'], dayfirst=not es_iso)
+    return df
+
+
+def _desplegar_lineas_ics(texto):
+    """Une las líneas de continuación de iCalendar (RFC 5545: empiezan con espacio o tab)."""
+    lineas = []
+    for linea in texto.splitlines():
+        if linea[:1] in (' ', '\t') and lineas:
+            lineas[-1] += linea[1:]
+        else:
+            lineas.append(linea)
+    return lineas
+
+
+def _parsear_fecha_ics(valor):
+    """Convierte DTSTART (20251004, 20251004T143000 o 20251004T143000Z) a Timestamp sin zona."""
+    fecha = pd.to_datetime(valor.strip(), format='%Y%m%d' if len(valor.strip()) == 8 else None)
+    if fecha.tzinfo is not None:
+        fecha = fecha.tz_convert(None)
+    return fecha
+
+
+def cargar_fixtures_ics(path):
+    """Lee un calendario iCalendar (.ics): un VEVENT por partido, con 'Local vs Visitante' en SUMMARY."""
+    texto = Path(path).read_text(encoding='utf-8')
+    partidos, evento = [], None
+
+    for linea in _desplegar_lineas_ics(texto):
+        if linea == 'BEGIN:VEVENT':
+            evento = {}
+        elif linea == 'END:VEVENT' and evento is not None:
+            coincidencia = PATRON_PARTIDO.match(evento.get('SUMMARY', ''))
+            if coincidencia and 'DTSTART' in evento:
+                partidos.append({
+                    'Fecha': _parsear_fecha_ics(evento['DTSTART']),
+                    'Local': coincidencia.group(1),
+                    'Visitante': coincidencia.group(2),
+                })
+            evento = None
+        elif evento is not None and ':' in linea:
+            clave, valor = linea.split(':', 1)
+            # Se descartan parámetros como DTSTART;TZID=Europe/London
+            evento[clave.split(';', 1)[0].upper()] = valor.replace('\\,', ',')
+
+    return pd.DataFrame(partidos, columns=['Fecha', 'Local', 'Visitante'])
+
+
+def cargar_fixtures(path=FIXTURES_PATH):
+    """Carga los partidos a predecir desde CSV o ICS, normaliza nombres y ordena por fecha."""
+    path = Path(path)
+    if path.suffix.lower() == '.ics':
+        df = cargar_fixtures_ics(path)
+    else:
+        df = cargar_fixtures_csv(path)
+
+    df['Local'] = df['Local'].str.strip().replace(NAME_MAPPING)
+    df['Visitante'] = df['Visitante'].str.strip().replace(NAME_MAPPING)
+    return df.sort_values(by='Fecha', kind='stable').reset_index(drop=True)
+
+# --- SALIDA COLUMNAR ---
+
+def guardar_columnar(df, output_path):
+    """
+    Guarda en Parquet (columnar). Si no está instalado 'pyarrow' (o 'fastparquet'),
+    cae a CSV junto al destino. Devuelve la ruta escrita.
+    """
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        df.to_parquet(output_path, index=False)
+        return output_path
+    except ImportError:
+        ruta_csv = output_path.with_suffix('.csv')
+        print(f"⚠️ Parquet no disponible (instala 'pyarrow'). Guardando en CSV: {ruta_csv.name}")
+        df.to_csv(ruta_csv, index=False)
+        return ruta_csv
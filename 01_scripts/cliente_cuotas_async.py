@@ -0,0 +1,209 @@
+import sys
+import time
+import random
+import asyncio
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+# Dependencia opcional: sólo la necesitan el cliente y el servidor simulado
+try:
+    import aiohttp
+except ImportError:
+    print("🚨 ERROR: 'cliente_cuotas_async.py' necesita el paquete 'aiohttp'. Instálalo con: pip install aiohttp")
+    sys.exit(1)
+
+from carga_jornadas import NAME_MAPPING
+from kelly_vectorizado import COLUMNAS_CUOTAS, imprimir_reporte, matriz_cuotas, matriz_probabilidades, optimos_por_partido, tabla_kelly
+
+# --- CONFIGURACIÓN DE RUTAS ---
+BASE_DIR = Path(__file__).resolve().parent
+PROYECTO_ROOT = BASE_DIR.parent
+
+PROBABILIDADES_PATH = PROYECTO_ROOT / '04_Modelos_Entrenados' / 'predicciones_jornada_V6_REAL.csv'
+# Mismo archivo que lee '03_prediccion_jornada.py' y vigila 'vigilancia_cuotas.py'
+CUOTAS_PATH = PROYECTO_ROOT / '04_Modelos_Entrenados' / 'cuotas_jornada.csv'
+
+# --- FUENTES DE CUOTAS ---
+# Por defecto, las casas del servidor local 'servidor_cuotas_simulado.py'
+URL_SIMULADOR = 'http://127.0.0.1:8765/casas/{casa}/cuotas'
+FUENTES = [
+    {'nombre': f'casa{i}', 'url': URL_SIMULADOR.format(casa=f'casa{i}'), 'peticiones_por_segundo': 20}
+    for i in range(1, 9)
+]
+
+# --- PARÁMETROS DEL CLIENTE ---
+LIMITE_CONEXIONES = 32          # Tamaño total del pool de conexiones
+LIMITE_CONEXIONES_HOST = 8      # Conexiones simultáneas por host
+TIMEOUT_SEGUNDOS = 5
+MAX_REINTENTOS = 4
+BACKOFF_BASE = 0.1              # Segundos; se duplica en cada reintento (con jitter)
+INTERVALO_SONDEO = 1.0          # Segundos entre rondas de sondeo
+
+# --- LIMITACIÓN DE TASA POR FUENTE ---
+
+def crear_limitador(peticiones_por_segundo):
+    return {'intervalo': 1.0 / peticiones_por_segundo, 'siguiente': 0.0, 'lock': asyncio.Lock()}
+
+
+async def esperar_turno(limitador):
+    """Espacia las peticiones a una misma fuente al menos 'intervalo' segundos."""
+    async with limitador['lock']:
+        ahora = time.monotonic()
+        espera = limitador['siguiente'] - ahora
+        if espera > 0:
+            await asyncio.sleep(espera)
+        limitador['siguiente'] = max(ahora, limitador['siguiente']) + limitador['intervalo']
+
+# --- PETICIONES ---
+
+async def obtener_cuotas_fuente(sesion, fuente, limitador, latencias=None):
+    """GET a una fuente con reintentos y backoff exponencial. Devuelve el JSON o None si falla."""
+    for intento in range(MAX_REINTENTOS + 1):
+        await esperar_turno(limitador)
+        t0 = time.perf_counter()
+        espera = BACKOFF_BASE * (2 ** intento) * random.uniform(0.5, 1.5)
+        try:
+            async with sesion.get(fuente['url']) as respuesta:
+                if respuesta.status == 200:
+                    datos = await respuesta.json()
+                    if latencias is not None:
+                        latencias.append(time.perf_counter() - t0)
+                    return datos
+                if respuesta.status not in (429, 500, 502, 503, 504):
+                    print(f"⚠️ {fuente['nombre']}: respuesta {respuesta.status}, se descarta.")
+                    return None
+                # Respetar Retry-After si la fuente lo indica
+                retry_after = respuesta.headers.get('Retry-After')
+                if retry_after:
+                    try:
+                        espera = max(espera, float(retry_after))
+                    except ValueError:
+                        pass
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            pass
+
+        if intento < MAX_REINTENTOS:
+            await asyncio.sleep(espera)
+
+    print(f"⚠️ {fuente['nombre']}: sin respuesta tras {MAX_REINTENTOS} reintentos.")
+    return None
+
+
+def crear_sesion():
+    """Sesión HTTP con pool de conexiones reutilizables (keep-alive) compartido por todas las fuentes."""
+    conector = aiohttp.TCPConnector(limit=LIMITE_CONEXIONES, limit_per_host=LIMITE_CONEXIONES_HOST)
+    return aiohttp.ClientSession(connector=conector, timeout=aiohttp.ClientTimeout(total=TIMEOUT_SEGUNDOS))
+
+
+async def sondear_ronda(sesion, fuentes, limitadores, latencias=None):
+    """Pide las cuotas a todas las fuentes a la vez. Devuelve las respuestas válidas."""
+    tareas = [obtener_cuotas_fuente(sesion, f, limitadores[f['nombre']], latencias) for f in fuentes]
+    return [r for r in await asyncio.gather(*tareas) if r is not None]
+
+# --- NORMALIZACIÓN ---
+
+def normalizar_cuotas(respuestas):
+    """
+    Pasa las respuestas de todas las casas al formato de 'cuotas_jornada.csv'
+    (Local, Visitante, Mas_X.5, Menos_X.5), quedándose con la mejor cuota de cada mercado.
+    """
+    filas = []
+    for respuesta in respuestas:
+        for partido in respuesta.get('partidos', []):
+            local = NAME_MAPPING.get(partido['local'], partido['local'])
+            visitante = NAME_MAPPING.get(partido['visitante'], partido['visitante'])
+            for mercado in partido.get('mercados', []):
+                filas.append((local, visitante, f"Mas_{float(mercado['linea'])}", mercado.get('over')))
+                filas.append((local, visitante, f"Menos_{float(mercado['linea'])}", mercado.get('under')))
+
+    if not filas:
+        return pd.DataFrame(columns=['Local', 'Visitante'] + COLUMNAS_CUOTAS)
+
+    largo = pd.DataFrame(filas, columns=['Local', 'Visitante', 'Mercado', 'Cuota'])
+    largo['Cuota'] = pd.to_numeric(largo['Cuota'], errors='coerce')
+    ancho = largo.pivot_table(index=['Local', 'Visitante'], columns='Mercado', values='Cuota', aggfunc='max')
+    ancho = ancho.reindex(columns=COLUMNAS_CUOTAS).reset_index()
+    ancho.columns.name = None
+    return ancho
+
+# --- INTEGRACIÓN CON KELLY ---
+
+async def ingerir_cuotas(fuentes=FUENTES, n_rondas=1, intervalo=INTERVALO_SONDEO, df_probabilidades=None,
+                         cuotas_path=None):
+    """
+    Sondea todas las fuentes 'n_rondas' veces (None = sin fin). Tras cada ronda normaliza
+    las cuotas, opcionalmente las escribe en 'cuotas_path' y evalúa Kelly si hay probabilidades.
+    """
+    limitadores = {f['nombre']: crear_limitador(f['peticiones_por_segundo']) for f in fuentes}
+    prob = matriz_probabilidades(df_probabilidades) if df_probabilidades is not None else None
+    df_cuotas = None
+
+    async with crear_sesion() as sesion:
+        ronda = 0
+        while n_rondas is None or ronda < n_rondas:
+            respuestas = await sondear_ronda(sesion, fuentes, limitadores)
+            df_cuotas = normalizar_cuotas(respuestas)
+
+            if cuotas_path is not None and not df_cuotas.empty:
+                # Escritura atómica: 'vigilancia_cuotas.py' nunca ve un archivo a medias
+                temporal = cuotas_path.with_suffix('.tmp')
+                df_cuotas.to_csv(temporal, index=False)
+                temporal.replace(cuotas_path)
+
+            if prob is not None:
+                print("\n" + "="*80)
+                print(f"      📡 RONDA {ronda + 1}: {len(respuestas)}/{len(fuentes)} fuentes | {len(df_cuotas)} partidos")
+                print("="*80)
+                imprimir_reporte(optimos_por_partido(tabla_kelly(prob, matriz_cuotas(df_cuotas))))
+
+            ronda += 1
+            if n_rondas is None or ronda < n_rondas:
+                await asyncio.sleep(intervalo)
+
+    return df_cuotas
+
+# --- BENCHMARK OFFLINE (con el servidor simulado) ---
+
+async def benchmark(n_rondas=20, n_casas=8):
+    """Mide rendimiento y latencia del cliente contra el servidor local (sin red externa)."""
+    from servidor_cuotas_simulado import PUERTO, iniciar_servidor
+
+    runner = await iniciar_servidor(n_casas=n_casas, semilla=0)
+    fuentes = [
+        {'nombre': f'casa{i}', 'url': URL_SIMULADOR.format(casa=f'casa{i}'), 'peticiones_por_segundo': 50}
+        for i in range(1, n_casas + 1)
+    ]
+    limitadores = {f['nombre']: crear_limitador(f['peticiones_por_segundo']) for f in fuentes}
+    latencias = []
+
+    try:
+        async with crear_sesion() as sesion:
+            t0 = time.perf_counter()
+            for _ in range(n_rondas):
+                respuestas = await sondear_ronda(sesion, fuentes, limitadores, latencias)
+                normalizar_cuotas(respuestas)
+            duracion = time.perf_counter() - t0
+    finally:
+        await runner.cleanup()
+
+    lat_ms = np.array(latencias) * 1000
+    print("\n" + "="*80)
+    print(f"      ⏱️ BENCHMARK CLIENTE DE CUOTAS ({n_casas} casas x {n_rondas} rondas, puerto {PUERTO})")
+    print("="*80)
+    print(f"Respuestas válidas: {len(lat_ms)} en {duracion:.2f} s -> {len(lat_ms) / duracion:.1f} peticiones/s")
+    print(f"Latencia p50: {np.percentile(lat_ms, 50):.1f} ms | p95: {np.percentile(lat_ms, 95):.1f} ms | "
+          f"máx: {lat_ms.max():.1f} ms")
+
+
+if __name__ == "__main__":
+    if '--benchmark' in sys.argv:
+        asyncio.run(benchmark())
+    else:
+        try:
+            df_probabilidades = pd.read_csv(PROBABILIDADES_PATH)
+        except FileNotFoundError:
+            df_probabilidades = None
+            print(f"⚠️ Sin probabilidades ({PROBABILIDADES_PATH.name}): sólo se guardarán las cuotas.")
+        # Sondeo continuo: actualiza 'cuotas_jornada.csv' y muestra el reporte de Kelly en cada ronda
+        asyncio.run(ingerir_cuotas(n_rondas=None, df_probabilidades=df_probabilidades, cuotas_path=CUOTAS_PATH))
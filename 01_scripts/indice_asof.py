@@ -0,0 +1,172 @@
+import sys
+import time
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+# --- CONFIGURACIÓN DE RUTAS ---
+BASE_DIR = Path(__file__).resolve().parent
+PROYECTO_ROOT = BASE_DIR.parent
+
+BASE_CONSOLIDADA_PATH = PROYECTO_ROOT / '03_Datos_Limpios' / 'premier_league_BASE_CONSOLIDADA.csv'
+
+# --- PARÁMETROS DE CÁLCULO ---
+N_CORNERS = 5
+N_ST = 10
+
+# Columnas del índice: (métrica, columna del Local, columna del Visitante)
+METRICAS = [('CORNERS', 'HC', 'AC'), ('ST', 'ST_H', 'ST_A')]
+DESPLAZAMIENTO_EQUIPO = np.int64(1) << 40 # Clave compuesta: código_equipo * 2^40 + segundos
+
+# --- CONSTRUCCIÓN DEL ÍNDICE ---
+
+def cargar_historial(consolidada_path):
+    """Carga la base consolidada con los nombres de columnas del modelo V6.0, ordenada por fecha."""
+    return preparar_historial(pd.read_csv(consolidada_path))
+
+
+def preparar_historial(df_consolidada):
+    """Igual que 'cargar_historial', pero a partir de la base consolidada ya en memoria."""
+    df = df_consolidada.copy()
+    df.columns = ['Fecha', 'Local', 'Visitante', 'Resultado_Final',
+                  'HC', 'AC', 'ST_H', 'ST_A', 'FT_H', 'FT_A', 'OFF_H', 'OFF_A',
+                  'Total_Tiros', 'Total_Tiros_Libres', 'Total_Offsides', 'Total_Corners']
+    df['Fecha'] = pd.to_datetime(df['Fecha'])
+    return df.sort_values(by='Fecha', kind='stable').reset_index(drop=True)
+
+
+def _segundos(fechas):
+    """Segundos desde época (int64) para un escalar, array o Series de fechas."""
+    fechas = np.atleast_1d(np.asarray(fechas))
+    if not np.issubdtype(fechas.dtype, np.datetime64):
+        fechas = pd.to_datetime(fechas).to_numpy()
+    return fechas.astype('datetime64[s]').astype(np.int64)
+
+
+def construir_indice_asof(df_historial):
+    """
+    Índice "as-of": para cada equipo, sus partidos ordenados por fecha (clave compuesta
+    equipo/fecha) y sumas prefijas de AF/EC. La forma en cualquier instante sale de una
+    búsqueda binaria y una resta.
+    """
+    codigos, equipos = pd.factorize(pd.concat([df_historial['Local'], df_historial['Visitante']]))
+    n = len(df_historial)
+    segundos = np.tile(_segundos(df_historial['Fecha']), 2)
+
+    # Valores AF/EC por (partido, equipo): columnas CORNERS_AF, CORNERS_EC, ST_AF, ST_EC
+    valores = []
+    for _, col_home, col_away in METRICAS:
+        home = df_historial[col_home].to_numpy(dtype=float)
+        away = df_historial[col_away].to_numpy(dtype=float)
+        valores.append(np.concatenate([home, away])) # AF: Local -> HC, Visitante -> AC
+        valores.append(np.concatenate([away, home])) # EC
+    valores = np.column_stack(valores)
+
+    claves = codigos.astype(np.int64) * DESPLAZAMIENTO_EQUIPO + segundos
+    orden = np.argsort(claves, kind='stable')
+    claves = claves[orden]
+    valores = valores[orden]
+
+    # Sumas y conteos prefijos (los NaN no suman ni cuentan, como rolling().mean())
+    validos = ~np.isnan(valores)
+    sumas = np.vstack([np.zeros((1, valores.shape[1])), np.cumsum(np.where(validos, valores, 0.0), axis=0)])
+    conteos = np.vstack([np.zeros((1, valores.shape[1]), dtype=np.int64), np.cumsum(validos, axis=0)])
+
+    # Posición del primer partido de cada equipo dentro del índice
+    codigos_ordenados = claves // DESPLAZAMIENTO_EQUIPO
+    inicio = np.searchsorted(codigos_ordenados, np.arange(len(equipos)), side='left')
+
+    return {
+        'equipos': pd.Index(equipos),
+        'codigo_equipo': {equipo: i for i, equipo in enumerate(equipos)},
+        'claves': claves,
+        'sumas': sumas,
+        'conteos': conteos,
+        'inicio': inicio,
+        'n_partidos': n,
+    }
+
+# --- CONSULTAS ---
+
+def forma_asof(indice, equipos, fechas, n_corners=N_CORNERS, n_st=N_ST):
+    """
+    Promedios AF/EC de los últimos N partidos ESTRICTAMENTE anteriores a cada fecha, para
+    arrays de (equipo, fecha). Nunca usa filas con fecha >= la consultada.
+    Devuelve un dict de arrays: CORNERS_AF_AVG, CORNERS_EC_AVG, ST_AF_AVG, ST_EC_AVG.
+    """
+    mapa = indice['codigo_equipo']
+    codigos = np.array([mapa.get(e, -1) for e in np.atleast_1d(np.asarray(equipos, dtype=object))], dtype=np.int64)
+    conocido = codigos >= 0
+    codigos_seguros = np.where(conocido, codigos, 0)
+
+    consulta = codigos_seguros.astype(np.int64) * DESPLAZAMIENTO_EQUIPO + _segundos(fechas)
+    k = np.searchsorted(indice['claves'], consulta, side='left') # Partidos del equipo anteriores: [inicio, k)
+    inicio = indice['inicio'][codigos_seguros]
+
+    # Inicio de la ventana por columna (CORNERS_AF, CORNERS_EC, ST_AF, ST_EC): N partidos atrás
+    lo_corners = np.maximum(inicio, k - n_corners)
+    lo_st = np.maximum(inicio, k - n_st)
+    lo = np.column_stack([lo_corners, lo_corners, lo_st, lo_st])
+    columnas = np.arange(4)
+
+    suma = indice['sumas'][k] - indice['sumas'][lo, columnas]
+    cuenta = indice['conteos'][k] - indice['conteos'][lo, columnas]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        medias = np.where((cuenta > 0) & conocido[:, None], suma / cuenta, np.nan)
+
+    resultado = {}
+    for j, (nombre, lado) in enumerate([(m[0], l) for m in METRICAS for l in ['AF', 'EC']]):
+        resultado[f'{nombre}_{lado}_AVG'] = medias[:, j]
+    return resultado
+
+
+def calcular_metricas_asof(indice, df_partidos, n_corners=N_CORNERS, n_st=N_ST):
+    """Las 8 métricas del modelo V6.0 para cada partido (Fecha, Local, Visitante), a fecha del partido."""
+    df_metricas = df_partidos[['Fecha', 'Local', 'Visitante']].reset_index(drop=True).copy()
+    for lado in ['Local', 'Visitante']:
+        forma = forma_asof(indice, df_metricas[lado].to_numpy(), df_metricas['Fecha'].to_numpy(), n_corners, n_st)
+        for col, valores in forma.items():
+            df_metricas[f'{lado}_{col}'] = valores
+    df_metricas['FACTOR_LOCAL'] = 1.0
+    return df_metricas.set_index(df_partidos.index)
+
+
+def partidos_en_fecha(df_historial, fecha):
+    """Todos los partidos jugados en un día concreto (para repreciarlos con la forma de ese momento)."""
+    dia = pd.Timestamp(fecha).normalize()
+    return df_historial[df_historial['Fecha'].dt.normalize() == dia]
+
+# --- EJECUCIÓN DEL SCRIPT ---
+
+def repreciar_fecha(consolidada_path, fecha):
+    try:
+        df_historial = cargar_historial(consolidada_path)
+    except Exception as e:
+        print(f"🚨 ERROR al cargar la base consolidada: {e}")
+        return
+
+    t0 = time.perf_counter()
+    indice = construir_indice_asof(df_historial)
+    t_indice = time.perf_counter() - t0
+
+    df_partidos = partidos_en_fecha(df_historial, fecha)
+    if df_partidos.empty:
+        print(f"⚠️ No hay partidos en el historial para la fecha {fecha}.")
+        return
+
+    t0 = time.perf_counter()
+    df_metricas = calcular_metricas_asof(indice, df_partidos)
+    t_consulta = time.perf_counter() - t0
+
+    print("\n" + "="*80)
+    print(f"      🕰️ FORMA PREVIA (AS-OF) DE LOS PARTIDOS DEL {pd.Timestamp(fecha).date()}")
+    print("="*80)
+    print(df_metricas.to_string(index=False, float_format='{:.2f}'.format))
+    print(f"\nÍndice construido en {t_indice * 1000:.2f} ms ({indice['n_partidos']} partidos)")
+    print(f"Consulta de {len(df_metricas)} partidos en {t_consulta * 1e6:.0f} µs")
+
+
+if __name__ == "__main__":
+    # Uso: python indice_asof.py 2025-09-28
+    fecha = sys.argv[1] if len(sys.argv) > 1 else pd.Timestamp.today().strftime('%Y-%m-%d')
+    repreciar_fecha(BASE_CONSOLIDADA_PATH, fecha)
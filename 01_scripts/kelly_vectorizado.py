@@ -0,0 +1,85 @@
+import pandas as pd
+import numpy as np
+
+# --- PARÁMETROS DE CÁLCULO ---
+UMBRALES_ENTEROS = [7, 8, 9, 10, 11, 12] # Umbrales X.5 (de 7.5 a 12.5)
+
+# Orden fijo de mercados: columnas del CSV de cuotas, de probabilidades y etiqueta del reporte
+MERCADOS = [(f'Mas_{X}.5', f'Prob_MAS_{X}_5', f'Más {X}.5') for X in UMBRALES_ENTEROS] + \
+           [(f'Menos_{X}.5', f'Prob_MENOS_{X}_5', f'Menos {X}.5') for X in UMBRALES_ENTEROS]
+COLUMNAS_CUOTAS = [m[0] for m in MERCADOS]
+COLUMNAS_PROB = [m[1] for m in MERCADOS]
+ETIQUETAS = np.array([m[2] for m in MERCADOS])
+
+# --- MATRICES ---
+
+def matriz_probabilidades(df_probabilidades):
+    """Probabilidades del modelo como matriz (partidos x mercados), indexada por 'Local vs Visitante'."""
+    partidos = df_probabilidades['Local'] + ' vs ' + df_probabilidades['Visitante']
+    return pd.DataFrame(df_probabilidades[COLUMNAS_PROB].to_numpy(dtype=float),
+                        index=pd.Index(partidos, name='Partido'), columns=COLUMNAS_CUOTAS)
+
+
+def matriz_cuotas(df_cuotas):
+    """Cuotas como matriz (partidos x mercados); los mercados sin cuota quedan en NaN."""
+    df = df_cuotas.copy()
+    if 'Partido' not in df.columns:
+        df['Partido'] = df['Local'] + ' vs ' + df['Visitante']
+    df = df.drop_duplicates(subset='Partido', keep='first').set_index('Partido')
+    return df.reindex(columns=COLUMNAS_CUOTAS).apply(pd.to_numeric, errors='coerce')
+
+# --- KELLY ---
+
+def fraccion_kelly(p, c):
+    """Fórmula de Kelly (f): f = (P*C - 1) / (C - 1), elemento a elemento; -1 si C <= 1."""
+    p = np.asarray(p, dtype=float)
+    c = np.asarray(c, dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(c > 1, (p * c - 1) / (c - 1), -1.0)
+
+
+def tabla_kelly(df_prob, df_cuotas_matriz):
+    """
+    Todas las apuestas con Kelly > 0 para los partidos comunes a ambas matrices,
+    con el mismo esquema que 'analizar_valor_kelly'.
+    """
+    partidos = df_prob.index.intersection(df_cuotas_matriz.index)
+    P = df_prob.loc[partidos].to_numpy()
+    C = df_cuotas_matriz.loc[partidos].to_numpy()
+    F = fraccion_kelly(P, C)
+
+    filas, cols = np.nonzero(F > 0)
+    return pd.DataFrame({
+        'Partido': partidos.to_numpy()[filas],
+        'Umbral': ETIQUETAS[cols],
+        'Cuota': C[filas, cols],
+        'Prob_Modelo': P[filas, cols],
+        'Fraccion_Kelly': F[filas, cols],
+        'Kelly_Media': F[filas, cols] / 2,
+    })
+
+
+def optimos_por_partido(df_kelly):
+    """Umbral óptimo (máximo Kelly Media) de cada partido, ordenado de mayor a menor."""
+    if df_kelly.empty:
+        return pd.DataFrame()
+    idx_max = df_kelly.groupby('Partido')['Kelly_Media'].idxmax()
+    return df_kelly.loc[idx_max].sort_values(by='Kelly_Media', ascending=False).reset_index(drop=True)
+
+
+def imprimir_reporte(df_valor_optimo):
+    """Mismo reporte final que '03_prediccion_jornada.py'."""
+    if df_valor_optimo.empty:
+        print("⚠️ No se encontró ninguna apuesta con valor positivo (Kelly > 0) en los umbrales analizados.")
+        return
+
+    df_valor_optimo = df_valor_optimo.copy()
+    total_kelly = df_valor_optimo['Kelly_Media'].sum()
+    df_valor_optimo['Peso_Relativo'] = (df_valor_optimo['Kelly_Media'] / total_kelly) * 100
+
+    df_reporte = df_valor_optimo[['Partido', 'Umbral', 'Cuota', 'Prob_Modelo', 'Peso_Relativo']].copy()
+    df_reporte['Prob_Modelo'] = (df_reporte['Prob_Modelo'] * 100).round(2).astype(str) + '%'
+    df_reporte['Peso_Relativo'] = df_reporte['Peso_Relativo'].round(2).astype(str) + '%'
+
+    print(df_reporte.to_string(index=False))
+    print(f"\n✅ Total de Capital Recomendado a Invertir: {total_kelly * 100:.2f}% de tu Bankroll.")
@@ -0,0 +1,259 @@
+import json
+import hashlib
+import time
+import pandas as pd
+import numpy as np
+import statsmodels.api as sm
+from pathlib import Path
+from scipy.optimize import minimize_scalar
+from scipy.special import gammaln
+from scipy.stats import poisson, nbinom
+
+# --- CONFIGURACIÓN DE RUTAS ---
+BASE_DIR = Path(__file__).resolve().parent
+PROYECTO_ROOT = BASE_DIR.parent
+
+# Ruta de entrada (la misma base que usa el modelo Poisson V6.0)
+BASE_MODELADO_PATH = PROYECTO_ROOT / '03_Datos_Limpios' / 'premier_league_BASE_V6_C5_ST10_FINAL.csv'
+# Modelo de conteo ajustado (coeficientes + dispersión) para el scoring por lotes
+OUTPUT_MODELO_PATH = PROYECTO_ROOT / '04_Modelos_Entrenados' / 'modelo_conteo_V7.json'
+
+# --- VARIABLES DEL MODELO (mismas que V6.0) ---
+X_COLS = [
+    'Local_CORNERS_AF_AVG', 'Local_CORNERS_EC_AVG', 'Visitante_CORNERS_AF_AVG', 'Visitante_CORNERS_EC_AVG',
+    'Local_ST_AF_AVG', 'Local_ST_EC_AVG', 'Visitante_ST_AF_AVG', 'Visitante_ST_EC_AVG',
+    'FACTOR_LOCAL'
+]
+Y_COL = 'CORNERS_TOTAL_PARTIDO'
+
+# --- PARÁMETROS DE CÁLCULO ---
+UMBRALES_ENTEROS = [7, 8, 9, 10, 11, 12] # Umbrales X.5 a calcular (de 7.5 a 12.5)
+MAX_ITER = 50
+TOLERANCIA = 1e-8
+PROPORCION_VALIDACION = 0.2 # Último 20% (cronológico) reservado para medir la calibración
+
+# --- AJUSTE VECTORIZADO (IRLS en NumPy, sin bucles por fila) ---
+
+def ajustar_poisson_irls(X, y, alpha=0.0, beta_inicial=None, pesos=None):
+    """
+    Ajusta un GLM log-lineal por IRLS. Con alpha = 0 es una Poisson; con alpha > 0
+    es una Binomial Negativa (NB2) con la dispersión fija. 'pesos' (opcional) pondera
+    cada partido en la verosimilitud. Devuelve los coeficientes.
+    """
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    if beta_inicial is None:
+        # Arranque estándar de IRLS: mu = y (desplazado para evitar log(0))
+        mu = y + 0.5
+        eta = np.log(mu)
+        beta = np.linalg.lstsq(X, eta, rcond=None)[0]
+    else:
+        beta = np.asarray(beta_inicial, dtype=float)
+
+    for _ in range(MAX_ITER):
+        eta = X @ beta
+        mu = np.exp(eta)
+        w = mu / (1.0 + alpha * mu)
+        if pesos is not None:
+            w = w * pesos
+        z = eta + (y - mu) / mu
+        # Mínimos cuadrados ponderados con solución de norma mínima: las métricas de
+        # Visitante replican las de Local, así que X no tiene rango completo (igual que pinv en statsmodels)
+        sw = np.sqrt(w)
+        beta_nuevo = np.linalg.lstsq(X * sw[:, None], z * sw, rcond=None)[0]
+        if np.max(np.abs(beta_nuevo - beta)) < TOLERANCIA:
+            beta = beta_nuevo
+            break
+        beta = beta_nuevo
+
+    return beta
+
+
+def log_verosimilitud_nb(y, mu, alpha, pesos=None):
+    """Log-verosimilitud total NB2 (o Poisson si alpha == 0), vectorizada y opcionalmente ponderada."""
+    y = np.asarray(y, dtype=float)
+    mu = np.asarray(mu, dtype=float)
+    if alpha <= 0:
+        ll = y * np.log(mu) - mu - gammaln(y + 1)
+    else:
+        r = 1.0 / alpha
+        ll = (
+            gammaln(y + r) - gammaln(r) - gammaln(y + 1)
+            + r * np.log(r / (r + mu)) + y * np.log(mu / (r + mu))
+        )
+    return np.sum(ll if pesos is None else ll * pesos)
+
+
+def ajustar_binomial_negativa(X, y, pesos=None):
+    """
+    Ajusta una Binomial Negativa NB2 alternando IRLS para los coeficientes y una
+    maximización escalar de la verosimilitud para la dispersión alpha.
+    Devuelve (beta, alpha).
+    """
+    beta = ajustar_poisson_irls(X, y, pesos=pesos)
+    alpha = 0.0
+
+    for _ in range(MAX_ITER):
+        mu = np.exp(X @ beta)
+        # Búsqueda de alpha en escala logarítmica (alpha > 0 siempre)
+        res = minimize_scalar(
+            lambda log_a: -log_verosimilitud_nb(y, mu, np.exp(log_a), pesos),
+            bounds=(-12.0, 3.0), method='bounded'
+        )
+        alpha_nuevo = float(np.exp(res.x))
+        beta = ajustar_poisson_irls(X, y, alpha=alpha_nuevo, beta_inicial=beta, pesos=pesos)
+        if abs(alpha_nuevo - alpha) < 1e-6:
+            alpha = alpha_nuevo
+            break
+        alpha = alpha_nuevo
+
+    return beta, alpha
+
+
+def entrenar_modelo_conteo(df, familia='binomial_negativa'):
+    """Entrena el backend de conteo elegido y lo devuelve como diccionario de modelo."""
+    datos = df.dropna(subset=X_COLS + [Y_COL])
+    X = datos[X_COLS].to_numpy(dtype=float)
+    y = datos[Y_COL].to_numpy(dtype=float)
+
+    if familia == 'poisson':
+        beta, alpha = ajustar_poisson_irls(X, y), 0.0
+    elif familia == 'binomial_negativa':
+        beta, alpha = ajustar_binomial_negativa(X, y)
+    else:
+        raise ValueError(f"Familia de conteo desconocida: {familia}")
+
+    return {
+        'familia': familia,
+        'coefs': dict(zip(X_COLS, beta.tolist())),
+        'alpha': alpha,
+    }
+
+
+def modelo_desde_coefs(coefs, familia='poisson', alpha=0.0):
+    """Envuelve un diccionario de coeficientes (p.ej. COEFS_V6) como modelo de conteo."""
+    return {'familia': familia, 'coefs': dict(coefs), 'alpha': alpha}
+
+
+def guardar_modelo(modelo, output_path):
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump(modelo, f, indent=2)
+
+
+def cargar_modelo(model_path):
+    with open(model_path) as f:
+        return json.load(f)
+
+# --- SCORING POR LOTES (misma interfaz para Poisson y Binomial Negativa) ---
+
+def predecir_lambda(modelo, X):
+    """Lambda esperada para una matriz de métricas (filas = partidos, columnas = X_COLS)."""
+    beta = np.array([modelo['coefs'][col] for col in X_COLS])
+    return np.exp(np.asarray(X, dtype=float) @ beta)
+
+
+def distribucion_conteo(modelo, lambdas):
+    """Devuelve la distribución congelada de scipy (vectorizada) para las lambdas dadas."""
+    alpha = modelo.get('alpha', 0.0)
+    if modelo['familia'] == 'poisson' or alpha <= 0:
+        return poisson(lambdas)
+    r = 1.0 / alpha
+    return nbinom(r, r / (r + lambdas))
+
+
+def puntuar_lote(df_metricas, modelo, umbrales=UMBRALES_ENTEROS):
+    """
+    Calcula Lambda y las probabilidades Más/Menos X.5 para todos los partidos de
+    df_metricas en una sola pasada. Mismas columnas que 'predicciones_jornada_V6_REAL.csv'.
+    """
+    lambdas = predecir_lambda(modelo, df_metricas[X_COLS].to_numpy(dtype=float))
+    dist = distribucion_conteo(modelo, lambdas)
+
+    resultado = pd.DataFrame({'Lambda': lambdas}, index=df_metricas.index)
+    for X in umbrales:
+        # P(Córners > X) = sf(X) ; P(Córners <= X) = cdf(X)
+        resultado[f'Prob_MAS_{X}_5'] = dist.sf(X)
+        resultado[f'Prob_MENOS_{X}_5'] = dist.cdf(X)
+    return resultado
+
+# --- BENCHMARK: TIEMPO DE AJUSTE Y CALIBRACIÓN ---
+
+def medir_calibracion(modelo, df_validacion, umbrales=UMBRALES_ENTEROS):
+    """Log-verosimilitud media y Brier / frecuencia observada por umbral en la validación."""
+    probs = puntuar_lote(df_validacion, modelo, umbrales)
+    y = df_validacion[Y_COL].to_numpy(dtype=float)
+    ll = log_verosimilitud_nb(y, probs['Lambda'].to_numpy(), modelo.get('alpha', 0.0)) / len(y)
+
+    filas = []
+    for X in umbrales:
+        p_mas = probs[f'Prob_MAS_{X}_5'].to_numpy()
+        obs_mas = (y > X).astype(float)
+        filas.append({
+            'Umbral': f'{X}.5',
+            'Prob_Media_MAS': p_mas.mean(),
+            'Frecuencia_MAS': obs_mas.mean(),
+            'Brier_MAS': np.mean((p_mas - obs_mas) ** 2),
+        })
+    return ll, pd.DataFrame(filas)
+
+
+def comparar_modelos(base_path, output_path):
+    """Compara Poisson vs Binomial Negativa: tiempo de ajuste, dispersión y calibración."""
+    try:
+        df = pd.read_csv(base_path)
+    except FileNotFoundError:
+        print(f"\n🚨 ERROR: Archivo no encontrado en: {base_path}")
+        return
+
+    df = df.dropna(subset=X_COLS + [Y_COL]).reset_index(drop=True)
+    corte = int(len(df) * (1 - PROPORCION_VALIDACION))
+    df_train, df_val = df.iloc[:corte], df.iloc[corte:]
+
+    X = df_train[X_COLS].to_numpy(dtype=float)
+    y = df_train[Y_COL].to_numpy(dtype=float)
+
+    # 1. Tiempos de ajuste (referencia statsmodels vs IRLS NumPy)
+    t0 = time.perf_counter()
+    sm.GLM(y, X, family=sm.families.Poisson()).fit()
+    t_statsmodels = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    modelo_poisson = entrenar_modelo_conteo(df_train, 'poisson')
+    t_poisson = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    modelo_nb = entrenar_modelo_conteo(df_train, 'binomial_negativa')
+    t_nb = time.perf_counter() - t0
+
+    # 2. Sobredispersión del Poisson (Pearson chi2 / gl)
+    mu = predecir_lambda(modelo_poisson, X)
+    dispersion = np.sum((y - mu) ** 2 / mu) / (len(y) - X.shape[1])
+
+    print("\n" + "="*80)
+    print("      ⚙️ BENCHMARK DE MODELOS DE CONTEO (POISSON vs BINOMIAL NEGATIVA)")
+    print("="*80)
+    print(f"Filas entrenamiento: {len(df_train)} | Filas validación: {len(df_val)}")
+    print(f"Tiempo ajuste statsmodels Poisson: {t_statsmodels * 1000:.2f} ms")
+    print(f"Tiempo ajuste IRLS NumPy Poisson:  {t_poisson * 1000:.2f} ms")
+    print(f"Tiempo ajuste IRLS NumPy NB2:      {t_nb * 1000:.2f} ms")
+    print(f"Dispersión Pearson (Poisson): {dispersion:.3f} | alpha NB2: {modelo_nb['alpha']:.4f}")
+
+    # 3. Calibración fuera de muestra
+    for nombre, modelo in [('POISSON', modelo_poisson), ('BINOMIAL NEGATIVA', modelo_nb)]:
+        ll, df_cal = medir_calibracion(modelo, df_val)
+        print(f"\n--- {nombre} | Log-verosimilitud media (validación): {ll:.4f} ---")
+        print(df_cal.round(4).to_string(index=False))
+
+    # 4. Guardar el modelo NB reentrenado con todos los datos
+    modelo_final = entrenar_modelo_conteo(df, 'binomial_negativa')
+    # Base con la que se ajustó (para detectar un JSON desfasado si la base se regenera)
+    modelo_final['base'] = {'archivo': base_path.name, 'filas': len(df),
+                            'sha256': hashlib.sha256(base_path.read_bytes()).hexdigest()}
+    guardar_modelo(modelo_final, output_path)
+    print(f"\n✅ Modelo Binomial Negativa guardado en: {output_path.name}")
+
+
+if __name__ == "__main__":
+    comparar_modelos(BASE_MODELADO_PATH, OUTPUT_MODELO_PATH)
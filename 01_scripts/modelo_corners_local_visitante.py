@@ -0,0 +1,205 @@
+import json
+import time
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from scipy.special import gammaln
+
+from modelo_conteo_corners import ajustar_poisson_irls, log_verosimilitud_nb
+
+# --- CONFIGURACIÓN DE RUTAS ---
+BASE_DIR = Path(__file__).resolve().parent
+PROYECTO_ROOT = BASE_DIR.parent
+
+BASE_CONSOLIDADA_PATH = PROYECTO_ROOT / '03_Datos_Limpios' / 'premier_league_BASE_CONSOLIDADA.csv'
+OUTPUT_MODELO_PATH = PROYECTO_ROOT / '04_Modelos_Entrenados' / 'modelo_local_visitante_V7.json'
+
+# --- PARÁMETROS DE CÁLCULO ---
+N_CORNERS = 5
+N_ST = 10
+UMBRALES_ENTEROS = [7, 8, 9, 10, 11, 12]     # Córners totales X.5
+UMBRALES_EQUIPO = [2, 3, 4, 5, 6, 7]         # Córners de un equipo X.5
+HANDICAPS = [-2.5, -1.5, -0.5, 0.5, 1.5, 2.5] # Hándicap de córners aplicado al Local
+K_MAX = 30 # Máximo de córners por equipo en las PMF (P(>30) es despreciable)
+
+# --- VARIABLES DE CADA MODELO ---
+# HC: ataque del Local contra la defensa del Visitante
+X_COLS_LOCAL = ['Local_CORNERS_AF_AVG', 'Visitante_CORNERS_EC_AVG', 'Local_ST_AF_AVG', 'Visitante_ST_EC_AVG', 'FACTOR_LOCAL']
+# AC: ataque del Visitante contra la defensa del Local
+X_COLS_VISITANTE = ['Visitante_CORNERS_AF_AVG', 'Local_CORNERS_EC_AVG', 'Visitante_ST_AF_AVG', 'Local_ST_EC_AVG', 'FACTOR_LOCAL']
+
+# --- MÉTRICAS POR EQUIPO (Local y Visitante calculados por separado) ---
+
+def cargar_historial(consolidada_path):
+    """Carga la base consolidada con los nombres de columnas del modelo V6.0, ordenada por fecha."""
+    df = pd.read_csv(consolidada_path)
+    df.columns = ['Fecha', 'Local', 'Visitante', 'Resultado_Final',
+                  'HC', 'AC', 'ST_H', 'ST_A', 'FT_H', 'FT_A', 'OFF_H', 'OFF_A',
+                  'Total_Tiros', 'Total_Tiros_Libres', 'Total_Offsides', 'Total_Corners']
+    df['Fecha'] = pd.to_datetime(df['Fecha'])
+    return df.sort_values(by='Fecha', kind='stable').reset_index(drop=True)
+
+
+def generar_base_local_visitante(df, n_corners=N_CORNERS, n_st=N_ST):
+    """
+    Devuelve una fila por partido con HC, AC y las métricas AF/EC previas al partido
+    de CADA equipo (no replicadas desde el Local como en la base V6).
+    """
+    # Formato largo: una fila por (partido, equipo)
+    largo = pd.concat([
+        pd.DataFrame({'Partido_ID': df.index, 'Fecha': df['Fecha'], 'Equipo': df['Local'], 'Es_Local': True,
+                      'CORNERS_AF': df['HC'], 'CORNERS_EC': df['AC'], 'ST_AF': df['ST_H'], 'ST_EC': df['ST_A']}),
+        pd.DataFrame({'Partido_ID': df.index, 'Fecha': df['Fecha'], 'Equipo': df['Visitante'], 'Es_Local': False,
+                      'CORNERS_AF': df['AC'], 'CORNERS_EC': df['HC'], 'ST_AF': df['ST_A'], 'ST_EC': df['ST_H']}),
+    ]).sort_values(by=['Equipo', 'Fecha', 'Partido_ID'], kind='stable')
+
+    grupos = largo.groupby('Equipo', sort=False)
+    for col, N in [('CORNERS_AF', n_corners), ('CORNERS_EC', n_corners), ('ST_AF', n_st), ('ST_EC', n_st)]:
+        # .shift(1) para usar sólo partidos ANTERIORES
+        largo[f'{col}_AVG'] = grupos[col].transform(lambda s: s.shift(1).rolling(window=N, min_periods=1).mean())
+
+    cols_avg = ['CORNERS_AF_AVG', 'CORNERS_EC_AVG', 'ST_AF_AVG', 'ST_EC_AVG']
+    metricas_local = largo[largo['Es_Local']].set_index('Partido_ID')[cols_avg].add_prefix('Local_')
+    metricas_visitante = largo[~largo['Es_Local']].set_index('Partido_ID')[cols_avg].add_prefix('Visitante_')
+
+    df_modelado = df[['Fecha', 'Local', 'Visitante', 'HC', 'AC']].join(metricas_local).join(metricas_visitante)
+    df_modelado['FACTOR_LOCAL'] = 1
+    return df_modelado
+
+# --- ENTRENAMIENTO ---
+
+def entrenar_modelo_local_visitante(df_modelado):
+    """Ajusta un GLM Poisson para HC y otro para AC (IRLS vectorizado)."""
+    datos = df_modelado.dropna(subset=sorted(set(X_COLS_LOCAL + X_COLS_VISITANTE)) + ['HC', 'AC'])
+
+    beta_local = ajustar_poisson_irls(datos[X_COLS_LOCAL].to_numpy(dtype=float), datos['HC'].to_numpy(dtype=float))
+    beta_visitante = ajustar_poisson_irls(datos[X_COLS_VISITANTE].to_numpy(dtype=float), datos['AC'].to_numpy(dtype=float))
+
+    return {
+        'coefs_local': dict(zip(X_COLS_LOCAL, beta_local.tolist())),
+        'coefs_visitante': dict(zip(X_COLS_VISITANTE, beta_visitante.tolist())),
+    }
+
+
+def guardar_modelo(modelo, output_path):
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump(modelo, f, indent=2)
+
+
+def cargar_modelo(model_path):
+    with open(model_path) as f:
+        return json.load(f)
+
+
+def predecir_lambdas(modelo, df_metricas):
+    """Devuelve (lambda_local, lambda_visitante) para todos los partidos de df_metricas."""
+    beta_l = np.array([modelo['coefs_local'][c] for c in X_COLS_LOCAL])
+    beta_v = np.array([modelo['coefs_visitante'][c] for c in X_COLS_VISITANTE])
+    lambda_l = np.exp(df_metricas[X_COLS_LOCAL].to_numpy(dtype=float) @ beta_l)
+    lambda_v = np.exp(df_metricas[X_COLS_VISITANTE].to_numpy(dtype=float) @ beta_v)
+    return lambda_l, lambda_v
+
+# --- PMF Y CONVOLUCIÓN POR LOTES ---
+
+def matriz_pmf_poisson(lambdas, k_max=K_MAX):
+    """PMF Poisson de 0..k_max para cada lambda. Forma (n_partidos, k_max + 1)."""
+    k = np.arange(k_max + 1)
+    lambdas = np.asarray(lambdas, dtype=float)[:, None]
+    return np.exp(k * np.log(lambdas) - lambdas - gammaln(k + 1))
+
+
+def convolucionar_pmfs(pmf_a, pmf_b):
+    """Convolución fila a fila de dos matrices de PMF mediante FFT (todas las filas a la vez)."""
+    largo = pmf_a.shape[1] + pmf_b.shape[1] - 1
+    n_fft = 1 << (largo - 1).bit_length()
+    conv = np.fft.irfft(np.fft.rfft(pmf_a, n_fft, axis=1) * np.fft.rfft(pmf_b, n_fft, axis=1), n_fft, axis=1)
+    # El redondeo de la FFT deja residuos ~1e-17 negativos
+    return np.clip(conv[:, :largo], 0.0, None)
+
+
+def puntuar_mercados(df_metricas, modelo, k_max=K_MAX):
+    """
+    Probabilidades de todos los mercados de córners (total, por equipo y hándicap)
+    para todos los partidos de df_metricas, sin bucles por partido.
+    """
+    lambda_l, lambda_v = predecir_lambdas(modelo, df_metricas)
+    pmf_l = matriz_pmf_poisson(lambda_l, k_max)
+    pmf_v = matriz_pmf_poisson(lambda_v, k_max)
+
+    cdf_total = np.cumsum(convolucionar_pmfs(pmf_l, pmf_v), axis=1)
+    cdf_l = np.cumsum(pmf_l, axis=1)
+    cdf_v = np.cumsum(pmf_v, axis=1)
+    # Diferencia HC - AC: convolución con la PMF visitante invertida (índice d + k_max)
+    cdf_diferencia = np.cumsum(convolucionar_pmfs(pmf_l, pmf_v[:, ::-1]), axis=1)
+
+    resultado = {
+        'Lambda_Local': lambda_l,
+        'Lambda_Visitante': lambda_v,
+        'Lambda': lambda_l + lambda_v,
+    }
+
+    # 1. Córners totales: P(Total <= X) = cdf[X]
+    for X in UMBRALES_ENTEROS:
+        resultado[f'Prob_MAS_{X}_5'] = 1.0 - cdf_total[:, X]
+        resultado[f'Prob_MENOS_{X}_5'] = cdf_total[:, X]
+
+    # 2. Córners por equipo
+    for X in UMBRALES_EQUIPO:
+        resultado[f'Prob_LOCAL_MAS_{X}_5'] = 1.0 - cdf_l[:, X]
+        resultado[f'Prob_LOCAL_MENOS_{X}_5'] = cdf_l[:, X]
+        resultado[f'Prob_VISITANTE_MAS_{X}_5'] = 1.0 - cdf_v[:, X]
+        resultado[f'Prob_VISITANTE_MENOS_{X}_5'] = cdf_v[:, X]
+
+    # 3. Hándicap: el Local gana el hándicap h si HC - AC > -h
+    for h in HANDICAPS:
+        etiqueta = f"{'M' if h < 0 else 'P'}{int(abs(h))}_5"
+        d_max_visitante = int(np.floor(-h)) # El Visitante cubre si HC - AC <= floor(-h)
+        p_visitante = cdf_diferencia[:, d_max_visitante + k_max]
+        resultado[f'Prob_HCP_LOCAL_{etiqueta}'] = 1.0 - p_visitante
+        resultado[f'Prob_HCP_VISITANTE_{etiqueta}'] = p_visitante
+
+    return pd.DataFrame(resultado, index=df_metricas.index)
+
+# --- EJECUCIÓN DEL SCRIPT ---
+
+def entrenar_y_evaluar(consolidada_path, output_path):
+    try:
+        df_historial = cargar_historial(consolidada_path)
+    except Exception as e:
+        print(f"🚨 ERROR al cargar la base consolidada: {e}")
+        return
+
+    df_modelado = generar_base_local_visitante(df_historial)
+    modelo = entrenar_modelo_local_visitante(df_modelado)
+    guardar_modelo(modelo, output_path)
+
+    df_eval = df_modelado.dropna(subset=sorted(set(X_COLS_LOCAL + X_COLS_VISITANTE)))
+
+    t0 = time.perf_counter()
+    df_mercados = puntuar_mercados(df_eval, modelo)
+    t_scoring = time.perf_counter() - t0
+
+    total = (df_eval['HC'] + df_eval['AC']).to_numpy(dtype=float)
+    ll = log_verosimilitud_nb(df_eval['HC'], df_mercados['Lambda_Local'], 0.0) + \
+         log_verosimilitud_nb(df_eval['AC'], df_mercados['Lambda_Visitante'], 0.0)
+
+    print("\n" + "="*80)
+    print("      ✅ MODELO DE CÓRNERS LOCAL / VISITANTE (CONVOLUCIÓN) COMPLETADO")
+    print(f"      Modelo guardado en: {output_path.name}")
+    print("="*80)
+    print("\n--- Coeficientes HC (Local) ---")
+    for col, coef in modelo['coefs_local'].items():
+        print(f"  {col:<28} {coef: .4f}")
+    print("\n--- Coeficientes AC (Visitante) ---")
+    for col, coef in modelo['coefs_visitante'].items():
+        print(f"  {col:<28} {coef: .4f}")
+
+    print(f"\nPartidos puntuados: {len(df_eval)} | Mercados por partido: {df_mercados.shape[1] - 3}")
+    print(f"Tiempo de scoring (todos los mercados): {t_scoring * 1000:.2f} ms")
+    print(f"Log-verosimilitud media (HC + AC): {ll / len(df_eval):.4f}")
+    print(f"Córners totales medios -> Predicho: {df_mercados['Lambda'].mean():.2f} | Observado: {total.mean():.2f}")
+
+
+if __name__ == "__main__":
+    entrenar_y_evaluar(BASE_CONSOLIDADA_PATH, OUTPUT_MODELO_PATH)
@@ -3,6 +3,8 @@ import numpy as np
 import statsmodels.api as sm
 from pathlib import Path
 
+from pesos_temporales import pesos_decaimiento, preparar_matriz_compartida, ventana
+
 # --- CONFIGURACIÓN DE RUTAS ---
 BASE_DIR = Path(__file__).resolve().parent
 PROYECTO_ROOT = BASE_DIR.parent 
@@ -13,15 +15,12 @@ BASE_MODELADO_PATH = PROYECTO_ROOT / '03_Datos_Limpios' / 'premier_league_BASE_V
 # 🌟 CORRECCIÓN DE RUTA FINAL: Usando tu carpeta '04_Modelos_Entrenados'
 OUTPUT_SUMMARY_PATH = PROYECTO_ROOT / '04_Modelos_Entrenados' / 'resumen_poisson_V6_FINAL.txt'
 
-def entrenar_modelo_poisson(base_path, output_path):
-    """Carga los datos, entrena el modelo de Regresión de Poisson y guarda el resumen."""
-    
-    try:
-        df = pd.read_csv(base_path)
-    except FileNotFoundError:
-        print(f"\n🚨 ERROR: Archivo no encontrado en: {base_path}")
-        print("Asegúrate de haber ejecutado el script de cálculo de datos ('calculo_datos_v6...') primero.")
-        return
+# --- PONDERACIÓN TEMPORAL (None = comportamiento original: todos los partidos con el mismo peso) ---
+VIDA_MEDIA_DIAS = None # Decaimiento exponencial por 'Fecha' (p.ej. 180 = un partido de hace 6 meses pesa 0.5)
+VENTANA_DIAS = None    # Sólo los últimos N días de historial (p.ej. 365)
+
+def ajustar_modelo_poisson(df, vida_media_dias=VIDA_MEDIA_DIAS, ventana_dias=VENTANA_DIAS):
+    """Entrena el modelo de Regresión de Poisson sobre la base de modelado (en memoria). Devuelve los resultados o None."""
 
     # 1. Definir Variables (Modelo V6.0)
     X_cols = [
@@ -29,15 +28,46 @@ def entrenar_modelo_poisson(base_path, output_path):
         'Local_ST_AF_AVG', 'Local_ST_EC_AVG', 'Visitante_ST_AF_AVG', 'Visitante_ST_EC_AVG',
         'FACTOR_LOCAL' 
     ]
-    Y = df['CORNERS_TOTAL_PARTIDO']
-    X = df[X_cols]
+    pesos = None
+
+    if vida_media_dias is None and ventana_dias is None:
+        Y = df['CORNERS_TOTAL_PARTIDO']
+        X = df[X_cols]
+    else:
+        # Matriz única ordenada por fecha; la ventana es un slice (vista) y el decaimiento un vector de pesos
+        try:
+            X_arr, Y_arr, dias = preparar_matriz_compartida(df)
+        except KeyError as e:
+            print(f"\n🚨 ERROR: {e}")
+            return
+        dia_referencia = dias[-1]
+        s = ventana(dias, None if ventana_dias is None else dia_referencia - ventana_dias + 1, None)
+        X = pd.DataFrame(X_arr[s], columns=X_cols, copy=False)
+        Y = pd.Series(Y_arr[s], name='CORNERS_TOTAL_PARTIDO', copy=False)
+        pesos = pesos_decaimiento(dias[s], dia_referencia, vida_media_dias)
+        print(f"Ponderación temporal -> vida media: {vida_media_dias} días | ventana: {ventana_dias} días")
     
-    print(f"\nDatos cargados. Filas totales: {len(df)}")
+    print(f"\nDatos cargados. Filas totales: {len(df)} | Filas de entrenamiento: {len(X)}")
     print(f"Columnas utilizadas (X): {len(X.columns)}")
     
     # 2. Entrenamiento del Modelo de Regresión de Poisson
-    poisson_model = sm.GLM(Y, X, family=sm.families.Poisson())
-    poisson_results = poisson_model.fit()
+    poisson_model = sm.GLM(Y, X, family=sm.families.Poisson(), var_weights=pesos)
+    return poisson_model.fit()
+
+
+def entrenar_modelo_poisson(base_path, output_path, vida_media_dias=VIDA_MEDIA_DIAS, ventana_dias=VENTANA_DIAS):
+    """Carga los datos, entrena el modelo de Regresión de Poisson y guarda el resumen."""
+    
+    try:
+        df = pd.read_csv(base_path)
+    except FileNotFoundError:
+        print(f"\n🚨 ERROR: Archivo no encontrado en: {base_path}")
+        print("Asegúrate de haber ejecutado el script de cálculo de datos ('calculo_datos_v6...') primero.")
+        return
+
+    poisson_results = ajustar_modelo_poisson(df, vida_media_dias, ventana_dias)
+    if poisson_results is None:
+        return
     
     # 3. Guardar Resumen
     
@@ -0,0 +1,131 @@
+import time
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+from modelo_conteo_corners import X_COLS, Y_COL, ajustar_poisson_irls, log_verosimilitud_nb
+
+# --- CONFIGURACIÓN DE RUTAS ---
+BASE_DIR = Path(__file__).resolve().parent
+PROYECTO_ROOT = BASE_DIR.parent
+
+BASE_MODELADO_PATH = PROYECTO_ROOT / '03_Datos_Limpios' / 'premier_league_BASE_V6_C5_ST10_FINAL.csv'
+
+# --- PARÁMETROS DE EVALUACIÓN ---
+VIDAS_MEDIAS_DIAS = [None, 30, 60, 90, 180, 365, 730] # None = sin decaimiento (pesos iguales)
+VENTANA_DIAS = None # None = ventana creciente (todo el pasado); p.ej. 365 = último año
+PASO_DIAS = 28 # Tamaño de cada bloque de validación walk-forward
+MIN_PARTIDOS_ENTRENAMIENTO = 100
+
+# --- MATRIZ COMPARTIDA ---
+
+def preparar_matriz_compartida(df):
+    """
+    Ordena una sola vez por 'Fecha' y devuelve (X, y, dias) como arrays contiguos.
+    Todas las ventanas y pesos posteriores se expresan sobre estos arrays, sin copiar filas.
+    """
+    if 'Fecha' not in df.columns:
+        raise KeyError("La base de modelado no tiene 'Fecha'. Ejecuta de nuevo 'calculo_datos_v6...' para regenerarla.")
+
+    datos = df.dropna(subset=X_COLS + [Y_COL]).sort_values(by='Fecha', kind='stable')
+    X = np.ascontiguousarray(datos[X_COLS].to_numpy(dtype=float))
+    y = np.ascontiguousarray(datos[Y_COL].to_numpy(dtype=float))
+    # Días desde época (enteros) para búsquedas binarias rápidas
+    dias = pd.to_datetime(datos['Fecha']).to_numpy().astype('datetime64[D]').astype(np.int64)
+    return X, y, dias
+
+
+def ventana(dias, inicio_dia=None, fin_dia=None):
+    """
+    Devuelve el slice [inicio_dia, fin_dia) sobre los arrays ordenados por fecha.
+    X[slice] es una vista de NumPy, no una copia.
+    """
+    i0 = 0 if inicio_dia is None else int(np.searchsorted(dias, inicio_dia, side='left'))
+    i1 = len(dias) if fin_dia is None else int(np.searchsorted(dias, fin_dia, side='left'))
+    return slice(i0, i1)
+
+
+def pesos_decaimiento(dias, dia_referencia, vida_media_dias):
+    """Pesos exponenciales: un partido con antigüedad = vida_media_dias pesa 0.5."""
+    if vida_media_dias is None:
+        return None
+    antiguedad = dia_referencia - dias
+    return np.power(0.5, antiguedad / vida_media_dias)
+
+
+def ventanas_deslizantes(dias, paso_dias=PASO_DIAS, ancho_dias=VENTANA_DIAS, min_partidos=MIN_PARTIDOS_ENTRENAMIENTO):
+    """
+    Genera (dia_corte, slice_entrenamiento, slice_validacion) walk-forward: se entrena con
+    los partidos anteriores al corte (limitados a 'ancho_dias' si se indica) y se valida
+    con los 'paso_dias' siguientes.
+    """
+    if len(dias) <= min_partidos:
+        return
+    corte = int(dias[min_partidos])
+    ultimo = int(dias[-1])
+    while corte <= ultimo:
+        inicio = None if ancho_dias is None else corte - ancho_dias
+        s_train = ventana(dias, inicio, corte)
+        s_val = ventana(dias, corte, corte + paso_dias)
+        if s_val.stop > s_val.start and s_train.stop > s_train.start:
+            yield corte, s_train, s_val
+        corte += paso_dias
+
+# --- EVALUACIÓN DE CONFIGURACIONES ---
+
+def evaluar_decaimientos(X, y, dias, vidas_medias=VIDAS_MEDIAS_DIAS, ancho_dias=VENTANA_DIAS, paso_dias=PASO_DIAS):
+    """
+    Log-verosimilitud Poisson fuera de muestra (walk-forward) para cada vida media.
+    Todas las configuraciones reutilizan la misma matriz X (vistas + vectores de pesos).
+    """
+    bloques = list(ventanas_deslizantes(dias, paso_dias, ancho_dias))
+    filas = []
+
+    for vida_media in vidas_medias:
+        t0 = time.perf_counter()
+        ll_total, n_total = 0.0, 0
+        beta = None
+        for corte, s_train, s_val in bloques:
+            pesos = pesos_decaimiento(dias[s_train], corte, vida_media)
+            # El beta del bloque anterior es un buen arranque para el siguiente
+            beta = ajustar_poisson_irls(X[s_train], y[s_train], beta_inicial=beta, pesos=pesos)
+            mu = np.exp(X[s_val] @ beta)
+            ll_total += log_verosimilitud_nb(y[s_val], mu, 0.0)
+            n_total += s_val.stop - s_val.start
+
+        filas.append({
+            'Vida_Media_Dias': 'Sin decaimiento' if vida_media is None else vida_media,
+            'Bloques': len(bloques),
+            'Partidos_Validacion': n_total,
+            'LogVerosimilitud_Media': ll_total / n_total if n_total else np.nan,
+            'Tiempo_ms': (time.perf_counter() - t0) * 1000,
+        })
+
+    return pd.DataFrame(filas)
+
+
+def ejecutar_evaluacion(base_path):
+    try:
+        df = pd.read_csv(base_path)
+        X, y, dias = preparar_matriz_compartida(df)
+    except FileNotFoundError:
+        print(f"\n🚨 ERROR: Archivo no encontrado en: {base_path}")
+        return
+    except KeyError as e:
+        print(f"\n🚨 ERROR: {e}")
+        return
+
+    df_resultados = evaluar_decaimientos(X, y, dias)
+
+    print("\n" + "="*80)
+    print("      ⏳ EVALUACIÓN WALK-FORWARD DE PESOS TEMPORALES")
+    print(f"      Ventana: {'creciente' if VENTANA_DIAS is None else f'{VENTANA_DIAS} días'} | Paso: {PASO_DIAS} días")
+    print("="*80)
+    print(df_resultados.round(4).to_string(index=False))
+
+    mejor = df_resultados.loc[df_resultados['LogVerosimilitud_Media'].idxmax()]
+    print(f"\n✅ Mejor configuración: vida media = {mejor['Vida_Media_Dias']}")
+
+
+if __name__ == "__main__":
+    ejecutar_evaluacion(BASE_MODELADO_PATH)
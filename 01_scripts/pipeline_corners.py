@@ -0,0 +1,265 @@
+import sys
+import json
+import time
+import pickle
+import hashlib
+import pandas as pd
+from pathlib import Path
+
+from carga_jornadas import FIXTURES_PATH, RUTA_CONSOLIDACION, _cargar_modulo, cargar_fixtures
+from indice_asof import calcular_metricas_asof, construir_indice_asof, preparar_historial
+from modelo_conteo_corners import modelo_desde_coefs, puntuar_lote
+
+# --- CONFIGURACIÓN DE RUTAS ---
+BASE_DIR = Path(__file__).resolve().parent
+PROYECTO_ROOT = BASE_DIR.parent
+
+DATOS_RAW_PATH = PROYECTO_ROOT / '02_Datos_Brutos'
+CACHE_PATH = PROYECTO_ROOT / '.cache_pipeline' # Salidas de cada etapa, direccionadas por su clave
+# Modelo propio del pipeline (coeficientes reentrenados en cada ejecución), distinto de COEFS_V6
+# de '03_prediccion_jornada.py': sus predicciones van a un archivo aparte y sin la calibración de COEFS_V6
+MODELO_PIPELINE = 'V6_reentrenado_pipeline'
+OUTPUT_PREDICCIONES_PATH = PROYECTO_ROOT / '04_Modelos_Entrenados' / 'predicciones_pipeline_V6.csv'
+
+# Salidas intermedias de los scripts manuales (sólo se escriben con --exportar)
+BASE_CONSOLIDADA_PATH = PROYECTO_ROOT / '03_Datos_Limpios' / 'premier_league_BASE_CONSOLIDADA.csv'
+BASE_MODELADO_PATH = PROYECTO_ROOT / '03_Datos_Limpios' / 'premier_league_BASE_V6_C5_ST10_FINAL.csv'
+# Resumen propio: 'resumen_poisson_V6_FINAL.txt' documenta COEFS_V6 y no se sobrescribe
+OUTPUT_SUMMARY_PATH = PROYECTO_ROOT / '04_Modelos_Entrenados' / 'resumen_poisson_pipeline_V6.txt'
+
+# --- PARÁMETROS DEL PIPELINE (forman parte de la clave de caché de cada etapa) ---
+PARAMETROS = {
+    'N_CORNERS': 5,
+    'N_ST': 10,
+    'VIDA_MEDIA_DIAS': None,
+    'VENTANA_DIAS': None,
+    'UMBRALES_ENTEROS': [7, 8, 9, 10, 11, 12],
+}
+
+# --- CARGA DE LOS SCRIPTS DE CADA ETAPA ---
+
+RUTA_CALCULO = BASE_DIR / 'calculo_datos_v6_C5_ST10_Totales.py'
+RUTA_ENTRENAMIENTO = BASE_DIR / 'modelo_regresion_poisson_V6_FINAL.py'
+RUTA_PIPELINE = Path(__file__).resolve() # Las funciones 'etapa_*' viven aquí: forma parte del código de cada etapa
+
+consolidacion = _cargar_modulo('consolidacion_datos', RUTA_CONSOLIDACION)
+calculo = _cargar_modulo('calculo_datos_v6', RUTA_CALCULO)
+entrenamiento = _cargar_modulo('modelo_regresion_poisson_v6', RUTA_ENTRENAMIENTO)
+
+# --- HUELLAS (HASHES) ---
+
+def huella_archivos(rutas):
+    """Huella del contenido (nombre + bytes) de una lista de archivos; los que no existen cuentan como ausentes."""
+    h = hashlib.sha256()
+    for ruta in sorted(Path(r) for r in rutas):
+        h.update(ruta.name.encode())
+        h.update(ruta.read_bytes() if ruta.exists() else b'<ausente>')
+    return h.hexdigest()
+
+
+def huella_salida(salida):
+    """Huella del contenido de la salida de una etapa (DataFrame o dict serializable a JSON)."""
+    h = hashlib.sha256()
+    if isinstance(salida, pd.DataFrame):
+        h.update(json.dumps([str(c) for c in salida.columns]).encode())
+        h.update(pd.util.hash_pandas_object(salida, index=True).to_numpy().tobytes())
+    else:
+        h.update(json.dumps(salida, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+def clave_etapa(nombre, etapa, parametros, huellas_dependencias):
+    """Clave de caché: código de la etapa + archivos fuente + parámetros que usa + huellas de sus entradas."""
+    contenido = {
+        'etapa': nombre,
+        'codigo': huella_archivos(etapa['codigo']),
+        'fuentes': huella_archivos(etapa['fuentes'](parametros)),
+        'parametros': {p: parametros[p] for p in etapa['parametros']},
+        'entradas': [huellas_dependencias[d] for d in etapa['dependencias']],
+    }
+    return hashlib.sha256(json.dumps(contenido, sort_keys=True, default=str).encode()).hexdigest()
+
+# --- ETAPAS ---
+
+def etapa_consolidacion(entradas, parametros):
+    df = consolidacion.construir_base_consolidada(DATOS_RAW_PATH)
+    if df is None:
+        raise FileNotFoundError(f"No hay archivos CSV en {DATOS_RAW_PATH}")
+    return df
+
+
+def etapa_metricas(entradas, parametros):
+    return calculo.construir_base_modelado(entradas['consolidacion'], parametros['N_CORNERS'], parametros['N_ST'])
+
+
+def etapa_entrenamiento(entradas, parametros):
+    resultados = entrenamiento.ajustar_modelo_poisson(entradas['metricas'], parametros['VIDA_MEDIA_DIAS'],
+                                                      parametros['VENTANA_DIAS'])
+    if resultados is None:
+        raise ValueError("No se pudo entrenar el modelo Poisson V6.0")
+    # Sólo lo necesario para predecir y el resumen de texto (no el objeto de statsmodels)
+    return {'coefs': {k: float(v) for k, v in resultados.params.items()},
+            'resumen': resultados.summary().as_text()}
+
+
+def etapa_prediccion(entradas, parametros):
+    df_historial = preparar_historial(entradas['consolidacion'])
+    jornada_df = cargar_fixtures(parametros['FIXTURES_PATH'])
+
+    indice = construir_indice_asof(df_historial)
+    df_metricas = calcular_metricas_asof(indice, jornada_df, parametros['N_CORNERS'], parametros['N_ST'])
+    modelo = modelo_desde_coefs(entradas['entrenamiento']['coefs'])
+    df_prob = puntuar_lote(df_metricas, modelo, parametros['UMBRALES_ENTEROS'])
+    df_prediccion = pd.concat([df_metricas, df_prob], axis=1)
+    df_prediccion['Modelo'] = MODELO_PIPELINE
+
+    columnas_finales = ['Fecha', 'Local', 'Visitante', 'Modelo', 'Lambda'] + \
+                       [col for col in df_prediccion.columns if 'Prob_' in col]
+    return df_prediccion[columnas_finales].reset_index(drop=True)
+
+
+# DAG en orden topológico: dependencias, parámetros que afectan a la salida, código y archivos de entrada
+ETAPAS = {
+    'consolidacion': {
+        'funcion': etapa_consolidacion,
+        'dependencias': [],
+        'parametros': [],
+        'codigo': [RUTA_PIPELINE, RUTA_CONSOLIDACION],
+        'fuentes': lambda parametros: list(DATOS_RAW_PATH.glob('*.[Cc][Ss][Vv]')),
+    },
+    'metricas': {
+        'funcion': etapa_metricas,
+        'dependencias': ['consolidacion'],
+        'parametros': ['N_CORNERS', 'N_ST'],
+        'codigo': [RUTA_PIPELINE, RUTA_CALCULO],
+        'fuentes': lambda parametros: [],
+    },
+    'entrenamiento': {
+        'funcion': etapa_entrenamiento,
+        'dependencias': ['metricas'],
+        'parametros': ['VIDA_MEDIA_DIAS', 'VENTANA_DIAS'],
+        'codigo': [RUTA_PIPELINE, RUTA_ENTRENAMIENTO, BASE_DIR / 'pesos_temporales.py'],
+        'fuentes': lambda parametros: [],
+    },
+    'prediccion': {
+        'funcion': etapa_prediccion,
+        'dependencias': ['consolidacion', 'entrenamiento'],
+        'parametros': ['N_CORNERS', 'N_ST', 'UMBRALES_ENTEROS', 'FIXTURES_PATH'],
+        'codigo': [RUTA_PIPELINE, BASE_DIR / 'indice_asof.py', BASE_DIR / 'modelo_conteo_corners.py',
+                   BASE_DIR / 'carga_jornadas.py',
+                   RUTA_CONSOLIDACION], # NAME_MAPPING de 'carga_jornadas.py' se lee de la consolidación
+        'fuentes': lambda parametros: [parametros['FIXTURES_PATH']],
+    },
+}
+
+# --- CACHÉ ---
+
+def _ruta_cache(cache_path, nombre, clave):
+    return cache_path / f'{nombre}-{clave[:16]}.pkl'
+
+
+def leer_huella_cache(cache_path, nombre, clave):
+    """Huella de la salida cacheada (sin cargar la salida) o None si la etapa no está en caché."""
+    meta = _ruta_cache(cache_path, nombre, clave).with_suffix('.json')
+    if not meta.exists() or not _ruta_cache(cache_path, nombre, clave).exists():
+        return None
+    return json.loads(meta.read_text())['huella']
+
+
+def cargar_cache(cache_path, nombre, clave):
+    with open(_ruta_cache(cache_path, nombre, clave), 'rb') as f:
+        return pickle.load(f)
+
+
+def guardar_cache(cache_path, nombre, clave, salida, huella):
+    """Escribe la salida y su huella; primero a un temporal para no dejar entradas a medias."""
+    cache_path.mkdir(parents=True, exist_ok=True)
+    ruta = _ruta_cache(cache_path, nombre, clave)
+    temporal = ruta.with_suffix('.tmp')
+    with open(temporal, 'wb') as f:
+        pickle.dump(salida, f, protocol=pickle.HIGHEST_PROTOCOL)
+    temporal.replace(ruta)
+    ruta.with_suffix('.json').write_text(json.dumps({'etapa': nombre, 'clave': clave, 'huella': huella}))
+
+# --- EJECUCIÓN DEL DAG ---
+
+def ejecutar_pipeline(parametros=None, objetivo='prediccion', forzar=False, cargar_todas=False,
+                      cache_path=CACHE_PATH, etapas=ETAPAS):
+    """
+    Resuelve el DAG hasta 'objetivo'. Cada etapa se identifica por una clave (código, fuentes,
+    parámetros y huellas de sus entradas): si está en caché no se ejecuta ni se carga hasta que
+    otra etapa la necesite. Las salidas pasan de una etapa a otra en memoria.
+    Devuelve (salidas, informe): la salida de 'objetivo' (o de todas las etapas con 'cargar_todas')
+    y el estado de cada etapa.
+    """
+    parametros = dict(PARAMETROS, FIXTURES_PATH=FIXTURES_PATH, **(parametros or {}))
+
+    # Etapas necesarias para el objetivo (cierre de dependencias, en orden topológico)
+    necesarias = {objetivo}
+    for nombre in reversed(list(etapas)):
+        if nombre in necesarias:
+            necesarias.update(etapas[nombre]['dependencias'])
+    orden = [n for n in etapas if n in necesarias]
+
+    claves, huellas, salidas, informe = {}, {}, {}, []
+
+    def obtener(nombre):
+        if nombre not in salidas:
+            salidas[nombre] = cargar_cache(cache_path, nombre, claves[nombre])
+        return salidas[nombre]
+
+    for nombre in orden:
+        etapa = etapas[nombre]
+        t0 = time.perf_counter()
+        claves[nombre] = clave_etapa(nombre, etapa, parametros, huellas)
+        huella = None if forzar else leer_huella_cache(cache_path, nombre, claves[nombre])
+
+        if huella is not None:
+            estado = 'caché'
+        else:
+            entradas = {d: obtener(d) for d in etapa['dependencias']}
+            salidas[nombre] = etapa['funcion'](entradas, parametros)
+            huella = huella_salida(salidas[nombre])
+            guardar_cache(cache_path, nombre, claves[nombre], salidas[nombre], huella)
+            estado = 'ejecutada'
+
+        huellas[nombre] = huella
+        informe.append({'Etapa': nombre, 'Estado': estado, 'Clave': claves[nombre][:12],
+                        'Tiempo_ms': round((time.perf_counter() - t0) * 1000, 1)})
+
+    for nombre in (orden if cargar_todas else [objetivo]):
+        obtener(nombre)
+    return salidas, pd.DataFrame(informe)
+
+
+def exportar_intermedios(salidas):
+    """Escribe las salidas en los mismos archivos que los scripts manuales (para quien los siga usando)."""
+    if 'consolidacion' in salidas:
+        BASE_CONSOLIDADA_PATH.parent.mkdir(parents=True, exist_ok=True)
+        salidas['consolidacion'].to_csv(BASE_CONSOLIDADA_PATH, index=False)
+    if 'metricas' in salidas:
+        salidas['metricas'].to_csv(BASE_MODELADO_PATH, index=False)
+    if 'entrenamiento' in salidas:
+        OUTPUT_SUMMARY_PATH.write_text(salidas['entrenamiento']['resumen'])
+
+
+if __name__ == "__main__":
+    argumentos = [a for a in sys.argv[1:] if not a.startswith('--')]
+    parametros = {'FIXTURES_PATH': Path(argumentos[0])} if argumentos else {}
+    exportar = '--exportar' in sys.argv
+
+    salidas, informe = ejecutar_pipeline(parametros, forzar='--forzar' in sys.argv, cargar_todas=exportar)
+    if exportar:
+        exportar_intermedios(salidas)
+
+    df_final = salidas['prediccion']
+    OUTPUT_PREDICCIONES_PATH.parent.mkdir(parents=True, exist_ok=True)
+    df_final.to_csv(OUTPUT_PREDICCIONES_PATH, index=False)
+
+    print("\n" + "="*80)
+    print("      🔗 PIPELINE V6.0 (consolidación → métricas → entrenamiento → predicción)")
+    print(f"      Modelo: {MODELO_PIPELINE} (coeficientes reentrenados, no COEFS_V6 ni su calibración)")
+    print("="*80)
+    print(informe.to_string(index=False))
+    print(f"\n✅ {len(df_final)} partidos puntuados. Guardado en: {OUTPUT_PREDICCIONES_PATH.name}")
+    print(df_final[['Local', 'Visitante', 'Lambda']].to_string(index=False))
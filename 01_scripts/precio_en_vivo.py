@@ -0,0 +1,230 @@
+import sys
+import time
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+from kelly_vectorizado import fraccion_kelly
+
+# --- CONFIGURACIÓN DE RUTAS ---
+BASE_DIR = Path(__file__).resolve().parent
+PROYECTO_ROOT = BASE_DIR.parent
+
+# Lambda pre-partido de cada encuentro (salida de '03_prediccion_jornada.py')
+PROBABILIDADES_PATH = PROYECTO_ROOT / '04_Modelos_Entrenados' / 'predicciones_jornada_V6_REAL.csv'
+
+# --- PARÁMETROS DE CÁLCULO ---
+DURACION_PARTIDO = 90        # Minutos del perfil; el descuento se trata como el minuto 90
+UMBRALES_EN_VIVO = list(range(0, 20)) # Escalera completa Más/Menos X.5 (de 0.5 a 19.5)
+FACTOR_FINAL_PARTE = 1.0     # Intensidad al final de cada parte respecto al inicio (1.0 = perfil uniforme)
+
+# --- PERFIL DE INTENSIDAD (precalculado) ---
+
+def perfil_intensidad(pesos_por_minuto=None, duracion=DURACION_PARTIDO):
+    """
+    Intensidad acumulada F(minuto) en los minutos 0..duracion, con F(0) = 0 y F(duracion) = 1.
+    'pesos_por_minuto' (longitud = duracion) es la intensidad relativa de cada minuto; None = uniforme.
+    """
+    pesos = np.ones(duracion) if pesos_por_minuto is None else np.asarray(pesos_por_minuto, dtype=float)
+    if len(pesos) != duracion:
+        raise ValueError(f"El perfil debe tener {duracion} pesos (uno por minuto), tiene {len(pesos)}")
+    acumulado = np.concatenate([[0.0], np.cumsum(pesos)])
+    return acumulado / acumulado[-1]
+
+
+def perfil_por_partes(factor_final=FACTOR_FINAL_PARTE, duracion=DURACION_PARTIDO):
+    """Perfil con intensidad lineal dentro de cada parte: 1 al inicio y 'factor_final' al final."""
+    mitad = duracion // 2
+    rampa = lambda n: np.linspace(1.0, factor_final, n)
+    return perfil_intensidad(np.concatenate([rampa(mitad), rampa(duracion - mitad)]), duracion)
+
+# --- ESTADO EN MEMORIA ---
+
+def crear_estado(df_probabilidades, perfil=None, umbrales=UMBRALES_EN_VIVO):
+    """
+    Estado de los partidos en juego: lambda pre-partido, minuto y córners actuales de cada uno,
+    más las tablas precalculadas (perfil acumulado, umbrales y su orden de mercados).
+    """
+    partidos = df_probabilidades['Local'] + ' vs ' + df_probabilidades['Visitante']
+    n = len(partidos)
+    perfil = perfil_por_partes() if perfil is None else perfil
+    return {
+        'partidos': pd.Index(partidos, name='Partido'),
+        'lambda_pre': df_probabilidades['Lambda'].to_numpy(dtype=float),
+        'minuto': np.zeros(n),
+        'corners': np.zeros(n, dtype=np.int64),
+        'perfil': perfil,
+        'minutos_perfil': np.arange(len(perfil), dtype=float),
+        'umbrales': np.asarray(umbrales, dtype=np.int64),
+        'k_max': int(max(umbrales)) + 1,
+        'columnas': [f'Mas_{X}.5' for X in umbrales] + [f'Menos_{X}.5' for X in umbrales],
+    }
+
+
+def lambda_restante(estado, indices):
+    """Córners esperados en lo que queda de partido: lambda_pre * (1 - F(minuto))."""
+    F = np.interp(estado['minuto'][indices], estado['minutos_perfil'], estado['perfil'])
+    return estado['lambda_pre'][indices] * (1.0 - F)
+
+
+def escalera(estado, indices):
+    """
+    Probabilidades Más/Menos X.5 del total final para los partidos 'indices', dado el marcador
+    de córners actual. Forma (partidos, 2 x umbrales): primero todos los Más, luego los Menos.
+    """
+    lam = lambda_restante(estado, indices)[:, None]
+    k_max = estado['k_max']
+    # PMF de Poisson 0..k_max por producto acumulado (válido también con lambda = 0 al final)
+    factores = np.empty((len(lam), k_max + 1))
+    factores[:, 0] = 1.0
+    factores[:, 1:] = lam / np.arange(1, k_max + 1)
+    cdf = np.cumsum(np.exp(-lam) * np.cumprod(factores, axis=1), axis=1)
+
+    # P(total <= X) = P(restantes <= X - actuales); 0 si ya se superó la línea
+    faltan = estado['umbrales'][None, :] - estado['corners'][indices][:, None]
+    p_menos = np.where(faltan >= 0, np.take_along_axis(cdf, np.clip(faltan, 0, k_max), axis=1), 0.0)
+    return np.concatenate([1.0 - p_menos, p_menos], axis=1)
+
+
+def actualizar(estado, indices, minutos, corners):
+    """Registra minuto y córners de uno o varios partidos y devuelve su escalera recalculada."""
+    indices = np.atleast_1d(indices)
+    estado['minuto'][indices] = minutos
+    estado['corners'][indices] = corners
+    return escalera(estado, indices)
+
+
+def kelly_en_vivo(probs, cuotas):
+    """Fracción de Kelly para cada mercado de la escalera (cuotas alineadas con 'columnas'; NaN = sin cuota)."""
+    return fraccion_kelly(probs, cuotas)
+
+
+def leer_cuotas(pares, columnas):
+    """
+    Cuotas en vivo escritas como 'Mas_9.5=1.85 Menos_10.5=2.10', alineadas con 'columnas'
+    (NaN en los mercados sin cuota). Devuelve None si no hay ninguna; ValueError si un par no es válido.
+    """
+    if not pares:
+        return None
+    cuotas = np.full((1, len(columnas)), np.nan)
+    for par in pares:
+        mercado, _, cuota = par.partition('=')
+        if mercado not in columnas:
+            raise ValueError(f"Mercado desconocido: {mercado}")
+        cuotas[0, columnas.index(mercado)] = float(cuota)
+    return cuotas
+
+
+def tabla_escalera(estado, indices, probs, cuotas=None):
+    """Escalera en formato largo (Partido, Mercado, Prob, Cuota_Justa[, Cuota, Fraccion_Kelly, Kelly_Media])."""
+    indices = np.atleast_1d(indices)
+    m = len(estado['columnas'])
+    with np.errstate(divide='ignore'):
+        tabla = pd.DataFrame({
+            'Partido': np.repeat(estado['partidos'].to_numpy()[indices], m),
+            'Minuto': np.repeat(estado['minuto'][indices], m),
+            'Corners': np.repeat(estado['corners'][indices], m),
+            'Mercado': np.tile(estado['columnas'], len(indices)),
+            'Prob': probs.ravel(),
+            'Cuota_Justa': 1.0 / probs.ravel(),
+        })
+    if cuotas is not None:
+        f = kelly_en_vivo(probs, cuotas)
+        tabla['Cuota'] = np.asarray(cuotas, dtype=float).ravel()
+        tabla['Fraccion_Kelly'] = f.ravel()
+        tabla['Kelly_Media'] = f.ravel() / 2
+    return tabla
+
+# --- BENCHMARK ---
+
+def benchmark(n_partidos=40, n_actualizaciones=20_000, semilla=0):
+    """Latencia de actualización: un partido por llamada y todos los partidos a la vez."""
+    rng = np.random.default_rng(semilla)
+    df = pd.DataFrame({'Local': [f'L{i}' for i in range(n_partidos)], 'Visitante': [f'V{i}' for i in range(n_partidos)],
+                       'Lambda': rng.uniform(8, 12, n_partidos)})
+    estado = crear_estado(df)
+    cuotas = rng.uniform(1.05, 6.0, (1, len(estado['columnas'])))
+
+    indices = rng.integers(0, n_partidos, n_actualizaciones)
+    minutos = rng.uniform(0, DURACION_PARTIDO, n_actualizaciones)
+    corners = rng.integers(0, 15, n_actualizaciones)
+
+    latencias = np.empty(n_actualizaciones)
+    for i in range(n_actualizaciones):
+        t0 = time.perf_counter()
+        kelly_en_vivo(actualizar(estado, indices[i], minutos[i], corners[i]), cuotas)
+        latencias[i] = time.perf_counter() - t0
+
+    todos = np.arange(n_partidos)
+    t0 = time.perf_counter()
+    for _ in range(1000):
+        kelly_en_vivo(actualizar(estado, todos, rng.uniform(0, 90, n_partidos), rng.integers(0, 15, n_partidos)),
+                      np.broadcast_to(cuotas, (n_partidos, cuotas.shape[1])))
+    lote = (time.perf_counter() - t0) / 1000
+
+    lat_us = latencias * 1e6
+    print("\n" + "="*80)
+    print(f"      ⏱️ BENCHMARK PRECIO EN VIVO ({n_partidos} partidos, {len(estado['columnas'])} mercados)")
+    print("="*80)
+    print(f"Actualización de 1 partido -> p50: {np.percentile(lat_us, 50):.1f} µs | "
+          f"p99: {np.percentile(lat_us, 99):.1f} µs | máx: {lat_us.max():.1f} µs")
+    print(f"Actualización de los {n_partidos} partidos en lote -> {lote * 1e6:.1f} µs "
+          f"({lote * 1e6 / n_partidos:.2f} µs por partido)")
+
+# --- EJECUCIÓN DEL SCRIPT ---
+
+if __name__ == "__main__":
+    if '--benchmark' in sys.argv:
+        benchmark()
+        exit()
+
+    try:
+        df_probabilidades = pd.read_csv(PROBABILIDADES_PATH)
+    except FileNotFoundError:
+        print(f"\n🚨 ERROR: No se encontraron las probabilidades: {PROBABILIDADES_PATH.name}")
+        print("Ejecuta primero '03_prediccion_jornada.py'.")
+        exit()
+
+    estado = crear_estado(df_probabilidades)
+
+    print("\n" + "="*80)
+    print("      ⚽ PRECIO EN VIVO DE CÓRNERS (Enter vacío para salir)")
+    print("="*80)
+    for i, partido in enumerate(estado['partidos']):
+        print(f"  [{i}] {partido} (Lambda pre-partido: {estado['lambda_pre'][i]:.2f})")
+
+    while True:
+        entrada = input("\nPartido, minuto, córners y cuotas opcionales (ej: 3 62 7 Mas_9.5=1.85 Menos_10.5=2.1): ").strip()
+        if not entrada:
+            break
+        try:
+            i, minuto, corners, *pares = entrada.split()
+            i, minuto, corners = int(i), float(minuto), int(corners)
+            if not 0 <= i < len(estado['partidos']):
+                raise ValueError(f"no hay partido {i}; elige entre 0 y {len(estado['partidos']) - 1}")
+            if minuto < 0 or corners < 0:
+                raise ValueError("el minuto y los córners no pueden ser negativos")
+            cuotas = leer_cuotas(pares, estado['columnas'])
+        except ValueError as e:
+            print(f"⚠️ Formato inválido ({e}). Escribe: número_partido minuto córners [Mercado=cuota ...]")
+            continue
+
+        probs = actualizar(estado, i, minuto, corners)
+        print(f"Córners restantes esperados: {lambda_restante(estado, [i])[0]:.2f}")
+        tabla = tabla_escalera(estado, i, probs, cuotas)
+        escalera_visible = tabla[(tabla['Prob'] > 0.01) & (tabla['Prob'] < 0.99)]
+        if escalera_visible.empty:
+            u = estado['umbrales']
+            print(f"⚠️ Con {corners} córners en el minuto {minuto:g}, todas las líneas de {u[0]}.5 a {u[-1]}.5 "
+                  "están prácticamente decididas (Prob < 1% o > 99%).")
+        else:
+            print(escalera_visible[['Mercado', 'Prob', 'Cuota_Justa']].round(3).to_string(index=False))
+
+        if cuotas is not None:
+            valor = tabla[tabla['Fraccion_Kelly'] > 0].sort_values(by='Kelly_Media', ascending=False)
+            if valor.empty:
+                print("⚠️ Ninguna de las cuotas introducidas tiene valor positivo (Kelly > 0).")
+            else:
+                print("\n⚙️ Apuestas con valor:")
+                print(valor[['Mercado', 'Prob', 'Cuota_Justa', 'Cuota', 'Fraccion_Kelly', 'Kelly_Media']]
+                      .round(4).to_string(index=False))
@@ -0,0 +1,279 @@
+import sys
+import time
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+from almacen_sqlite import temporada_de
+from carga_jornadas import cargar_fixtures
+from indice_asof import cargar_historial, construir_indice_asof, forma_asof
+from modelo_corners_local_visitante import X_COLS_LOCAL, X_COLS_VISITANTE, cargar_modelo
+
+# --- CONFIGURACIÓN DE RUTAS ---
+BASE_DIR = Path(__file__).resolve().parent
+PROYECTO_ROOT = BASE_DIR.parent
+
+BASE_CONSOLIDADA_PATH = PROYECTO_ROOT / '03_Datos_Limpios' / 'premier_league_BASE_CONSOLIDADA.csv'
+MODELO_LOCAL_VISITANTE_PATH = PROYECTO_ROOT / '04_Modelos_Entrenados' / 'modelo_local_visitante_V7.json'
+OUTPUT_PROYECCION_PATH = PROYECTO_ROOT / '04_Modelos_Entrenados' / 'proyeccion_temporada_V7.csv'
+
+# --- PARÁMETROS DE SIMULACIÓN ---
+N_CORNERS = 5
+N_ST = 10
+N_SIMULACIONES = 100_000
+TAMANO_BLOQUE = 10_000   # Temporadas simuladas por bloque (acota la memoria: bloque x equipos x N_CORNERS)
+ACTUALIZAR_FORMA = True  # Actualiza la forma de córners de cada equipo con los córners simulados ronda a ronda
+PERCENTILES = [5, 25, 50, 75, 95]
+SEMILLA = 2024
+
+# --- CALENDARIO RESTANTE ---
+
+def fixtures_restantes(df_historial, temporada=None):
+    """
+    Partidos (Local, Visitante) de la temporada que aún no se han jugado, asumiendo doble
+    vuelta entre todos los equipos que han jugado esa temporada. Devuelve (df_fixtures, temporada).
+    """
+    temporadas = temporada_de(df_historial['Fecha']).to_numpy()
+    temporada = temporada or temporadas[-1]
+    jugados = df_historial[temporadas == temporada]
+    equipos = sorted(set(jugados['Local']) | set(jugados['Visitante']))
+
+    todos = pd.MultiIndex.from_tuples([(l, v) for l in equipos for v in equipos if l != v])
+    pendientes = todos.difference(pd.MultiIndex.from_frame(jugados[['Local', 'Visitante']]))
+    df = pd.DataFrame(pendientes.to_list(), columns=['Local', 'Visitante'])
+    # Sin fecha real: todos se proyectan con la forma posterior al último partido jugado
+    df.insert(0, 'Fecha', df_historial['Fecha'].max() + pd.Timedelta(days=1))
+    return df, temporada
+
+
+def asignar_rondas(df_fixtures, respetar_orden=True):
+    """
+    Ronda de simulación de cada partido, sin que ningún equipo juegue dos veces en la misma
+    ronda (requisito para actualizar la forma). Con 'respetar_orden' cada partido va después
+    del anterior de sus equipos (fixtures con fecha); si no, ocupa la primera ronda libre
+    para ambos equipos (calendario generado, menos rondas).
+    """
+    ultima = {}
+    ocupados = []
+    rondas = np.empty(len(df_fixtures), dtype=np.int64)
+    for i, (local, visitante) in enumerate(zip(df_fixtures['Local'], df_fixtures['Visitante'])):
+        if respetar_orden:
+            r = max(ultima.get(local, -1), ultima.get(visitante, -1)) + 1
+        else:
+            r = next((j for j, o in enumerate(ocupados) if local not in o and visitante not in o), len(ocupados))
+        if r == len(ocupados):
+            ocupados.append(set())
+        ocupados[r].update((local, visitante))
+        rondas[i] = ultima[local] = ultima[visitante] = r
+    return rondas
+
+# --- ESTADO INICIAL DE CADA EQUIPO ---
+
+def ultimos_corners(df_historial, equipos, n=N_CORNERS):
+    """
+    Últimos n córners a favor / en contra de cada equipo, en orden cronológico.
+    Devuelve (af, ec, conteo) con af/ec de forma (equipos, n) rellenos con 0 donde no hay partido.
+    """
+    largo = pd.concat([
+        pd.DataFrame({'Fecha': df_historial['Fecha'], 'Equipo': df_historial['Local'],
+                      'AF': df_historial['HC'], 'EC': df_historial['AC']}),
+        pd.DataFrame({'Fecha': df_historial['Fecha'], 'Equipo': df_historial['Visitante'],
+                      'AF': df_historial['AC'], 'EC': df_historial['HC']}),
+    ]).sort_values(by='Fecha', kind='stable')
+    ultimos = largo.groupby('Equipo').tail(n)
+
+    af = np.zeros((len(equipos), n))
+    ec = np.zeros((len(equipos), n))
+    conteo = np.zeros(len(equipos), dtype=np.int64)
+    for i, equipo in enumerate(equipos):
+        filas = ultimos[ultimos['Equipo'] == equipo]
+        conteo[i] = len(filas)
+        af[i, :conteo[i]] = filas['AF'].to_numpy(dtype=float)
+        ec[i, :conteo[i]] = filas['EC'].to_numpy(dtype=float)
+    return af, ec, conteo
+
+
+def preparar_simulacion(df_historial, df_fixtures, modelo, temporada, n_corners=N_CORNERS, n_st=N_ST,
+                        respetar_orden=True):
+    """Todo lo que la simulación necesita como arrays: equipos, calendario, forma inicial y coeficientes."""
+    equipos = pd.Index(sorted(set(df_fixtures['Local']) | set(df_fixtures['Visitante'])))
+    fecha_inicio = df_fixtures['Fecha'].min()
+
+    indice = construir_indice_asof(df_historial)
+    forma = forma_asof(indice, equipos.to_numpy(), np.repeat(np.datetime64(fecha_inicio), len(equipos)),
+                       n_corners, n_st)
+    # Equipos sin historial (recién ascendidos): media de la liga
+    for col, valores in forma.items():
+        forma[col] = np.where(np.isnan(valores), np.nanmean(valores), valores)
+
+    af, ec, conteo = ultimos_corners(df_historial[df_historial['Fecha'] < fecha_inicio], equipos, n_corners)
+
+    jugados = df_historial[temporada_de(df_historial['Fecha']).to_numpy() == temporada]
+    acumulados = (jugados.groupby('Local')['HC'].sum().add(jugados.groupby('Visitante')['AC'].sum(), fill_value=0)
+                  .reindex(equipos, fill_value=0).to_numpy(dtype=np.int64))
+
+    return {
+        'equipos': equipos,
+        'local': equipos.get_indexer(df_fixtures['Local']),
+        'visitante': equipos.get_indexer(df_fixtures['Visitante']),
+        'rondas': asignar_rondas(df_fixtures, respetar_orden),
+        'forma': forma,
+        'ultimos_af': af,
+        'ultimos_ec': ec,
+        'conteo': conteo,
+        'acumulados': acumulados,
+        'beta_local': np.array([modelo['coefs_local'][c] for c in X_COLS_LOCAL]),
+        'beta_visitante': np.array([modelo['coefs_visitante'][c] for c in X_COLS_VISITANTE]),
+    }
+
+
+def _lambdas(sim, corners_af, corners_ec, local, visitante):
+    """Lambdas (Local, Visitante) para los partidos dados; corners_af/ec pueden tener una dimensión de simulación."""
+    st_af, st_ec = sim['forma']['ST_AF_AVG'], sim['forma']['ST_EC_AVG']
+    # Mismo orden que X_COLS_LOCAL / X_COLS_VISITANTE (el último término es FACTOR_LOCAL = 1)
+    bl, bv = sim['beta_local'], sim['beta_visitante']
+    eta_l = bl[0] * corners_af[..., local] + bl[1] * corners_ec[..., visitante] + \
+            bl[2] * st_af[local] + bl[3] * st_ec[visitante] + bl[4]
+    eta_v = bv[0] * corners_af[..., visitante] + bv[1] * corners_ec[..., local] + \
+            bv[2] * st_af[visitante] + bv[3] * st_ec[local] + bv[4]
+    return np.exp(eta_l), np.exp(eta_v)
+
+# --- SIMULACIÓN (vectorizada sobre temporadas) ---
+
+def simular_bloque_forma_fija(sim, n, rng):
+    """Sin actualizar forma: las lambdas son fijas y todo el calendario se simula de una vez."""
+    lam_l, lam_v = _lambdas(sim, sim['forma']['CORNERS_AF_AVG'], sim['forma']['CORNERS_EC_AVG'],
+                            sim['local'], sim['visitante'])
+    hc = rng.poisson(lam_l, size=(n, len(lam_l)))
+    ac = rng.poisson(lam_v, size=(n, len(lam_v)))
+
+    # Suma por equipo con matrices de incidencia (partidos x equipos); en float para usar BLAS
+    n_equipos = len(sim['equipos'])
+    incidencia_l = np.eye(n_equipos)[sim['local']]
+    incidencia_v = np.eye(n_equipos)[sim['visitante']]
+    totales = hc.astype(float) @ incidencia_l + ac.astype(float) @ incidencia_v
+    return np.rint(totales).astype(np.int64)
+
+
+def simular_bloque_con_forma(sim, n, rng):
+    """Ronda a ronda: los córners simulados entran en la forma (media de los últimos N) de cada equipo."""
+    n_ventana = sim['ultimos_af'].shape[1]
+    af = np.broadcast_to(sim['ultimos_af'], (n,) + sim['ultimos_af'].shape).copy()
+    ec = np.broadcast_to(sim['ultimos_ec'], (n,) + sim['ultimos_ec'].shape).copy()
+    conteo = sim['conteo'].copy()
+    totales = np.zeros((n, len(sim['equipos'])), dtype=np.int64)
+
+    for ronda in range(sim['rondas'].max() + 1):
+        m = sim['rondas'] == ronda
+        local, visitante = sim['local'][m], sim['visitante'][m]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media_af = np.where(conteo > 0, af.sum(axis=2) / np.minimum(conteo, n_ventana), sim['forma']['CORNERS_AF_AVG'])
+            media_ec = np.where(conteo > 0, ec.sum(axis=2) / np.minimum(conteo, n_ventana), sim['forma']['CORNERS_EC_AVG'])
+        lam_l, lam_v = _lambdas(sim, media_af, media_ec, local, visitante)
+        hc = rng.poisson(lam_l)
+        ac = rng.poisson(lam_v)
+
+        # Cada equipo juega como mucho una vez por ronda: la asignación por índice no tiene colisiones
+        totales[:, local] += hc
+        totales[:, visitante] += ac
+        for equipos_r, favor, contra in ((local, hc, ac), (visitante, ac, hc)):
+            posicion = conteo[equipos_r] % n_ventana # Buffer circular: sustituye el partido más antiguo
+            af[:, equipos_r, posicion] = favor
+            ec[:, equipos_r, posicion] = contra
+        conteo[local] += 1
+        conteo[visitante] += 1
+
+    return totales
+
+
+def simular_temporada(sim, n_simulaciones=N_SIMULACIONES, tamano_bloque=TAMANO_BLOQUE,
+                      actualizar_forma=ACTUALIZAR_FORMA, semilla=SEMILLA):
+    """
+    Simula 'n_simulaciones' temporadas por bloques y acumula, por equipo, el histograma de
+    córners totales de la temporada (jugados + simulados). Devuelve (histogramas, base) con
+    histogramas de forma (equipos, valores) y base = córners ya jugados de cada equipo.
+    """
+    rng = np.random.default_rng(semilla)
+    simular_bloque = simular_bloque_con_forma if actualizar_forma else simular_bloque_forma_fija
+    n_equipos = len(sim['equipos'])
+    histogramas = np.zeros((n_equipos, 0), dtype=np.int64)
+
+    for inicio in range(0, n_simulaciones, tamano_bloque):
+        n = min(tamano_bloque, n_simulaciones - inicio)
+        totales = simular_bloque(sim, n, rng)
+
+        # Histograma de todos los equipos con un único bincount (fila = equipo)
+        ancho = max(histogramas.shape[1], int(totales.max()) + 1)
+        conteos = np.bincount((totales + np.arange(n_equipos) * ancho).ravel(), minlength=n_equipos * ancho)
+        histogramas = np.pad(histogramas, ((0, 0), (0, ancho - histogramas.shape[1])))
+        histogramas += conteos.reshape(n_equipos, ancho)
+
+    return histogramas, sim['acumulados']
+
+# --- RESUMEN ---
+
+def resumir_distribuciones(equipos, histogramas, base, percentiles=PERCENTILES):
+    """Media, desviación y percentiles de los córners totales de la temporada de cada equipo."""
+    valores = np.arange(histogramas.shape[1])
+    probs = histogramas / histogramas.sum(axis=1, keepdims=True)
+    media = probs @ valores
+    desv = np.sqrt(probs @ valores ** 2 - media ** 2)
+    acumulada = np.cumsum(probs, axis=1)
+
+    resultado = pd.DataFrame({'Equipo': equipos, 'Corners_Jugados': base,
+                              'Corners_Media': base + media, 'Corners_Desv': desv})
+    for p in percentiles:
+        resultado[f'P{p:02d}'] = base + np.argmax(acumulada >= p / 100, axis=1)
+    return resultado.sort_values(by='Corners_Media', ascending=False).reset_index(drop=True)
+
+
+def probabilidad_mas(equipos, histogramas, base, equipo, linea):
+    """P(córners totales de la temporada > linea) para un equipo (p.ej. una línea de 180.5)."""
+    i = pd.Index(equipos).get_loc(equipo)
+    probs = histogramas[i] / histogramas[i].sum()
+    return probs[np.arange(len(probs)) + base[i] > linea].sum()
+
+# --- EJECUCIÓN DEL SCRIPT ---
+
+def proyectar_temporada(consolidada_path, modelo_path, output_path, fixtures_path=None,
+                        n_simulaciones=N_SIMULACIONES, actualizar_forma=ACTUALIZAR_FORMA):
+    try:
+        df_historial = cargar_historial(consolidada_path)
+        modelo = cargar_modelo(modelo_path)
+    except FileNotFoundError as e:
+        print(f"🚨 ERROR al cargar los datos: {e}")
+        print("Ejecuta primero 'modelo_corners_local_visitante.py' para entrenar el modelo Local / Visitante.")
+        return
+
+    if fixtures_path is None:
+        df_fixtures, temporada = fixtures_restantes(df_historial)
+    else:
+        df_fixtures = cargar_fixtures(fixtures_path)
+        temporada = temporada_de(df_fixtures['Fecha']).iloc[0]
+
+    sim = preparar_simulacion(df_historial, df_fixtures, modelo, temporada, respetar_orden=fixtures_path is not None)
+
+    t0 = time.perf_counter()
+    histogramas, base = simular_temporada(sim, n_simulaciones, actualizar_forma=actualizar_forma)
+    duracion = time.perf_counter() - t0
+
+    df_proyeccion = resumir_distribuciones(sim['equipos'], histogramas, base)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    df_proyeccion.to_csv(output_path, index=False)
+
+    print("\n" + "="*80)
+    print(f"      📈 PROYECCIÓN DE CÓRNERS TEMPORADA {temporada} ({n_simulaciones:,} simulaciones)")
+    print(f"      Partidos restantes: {len(df_fixtures)} en {sim['rondas'].max() + 1} rondas | "
+          f"Forma {'actualizada' if actualizar_forma else 'fija'} | {duracion:.2f} s")
+    print("="*80)
+    print(df_proyeccion.round(1).to_string(index=False))
+    print(f"\nProyección guardada en: {output_path.name}")
+    return df_proyeccion
+
+
+if __name__ == "__main__":
+    argumentos = [a for a in sys.argv[1:] if not a.startswith('--')]
+    fixtures_path = Path(argumentos[0]) if argumentos else None # Sin argumento: resto de la doble vuelta
+    proyectar_temporada(BASE_CONSOLIDADA_PATH, MODELO_LOCAL_VISITANTE_PATH, OUTPUT_PROYECCION_PATH, fixtures_path,
+                        actualizar_forma='--forma-fija' not in sys.argv)
@@ -0,0 +1,95 @@
+import sys
+import asyncio
+import random
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+# Dependencia opcional: sólo la necesitan el cliente y el servidor simulado
+try:
+    from aiohttp import web
+except ImportError:
+    print("🚨 ERROR: 'servidor_cuotas_simulado.py' necesita el paquete 'aiohttp'. Instálalo con: pip install aiohttp")
+    sys.exit(1)
+
+from carga_jornadas import FIXTURES_PATH, cargar_fixtures
+
+# --- CONFIGURACIÓN DE RUTAS ---
+BASE_DIR = Path(__file__).resolve().parent
+PROYECTO_ROOT = BASE_DIR.parent
+
+PROBABILIDADES_PATH = PROYECTO_ROOT / '04_Modelos_Entrenados' / 'predicciones_jornada_V6_REAL.csv'
+
+# --- PARÁMETROS DEL SERVIDOR SIMULADO ---
+HOST = '127.0.0.1'
+PUERTO = 8765
+N_CASAS = 8
+LINEAS = [7.5, 8.5, 9.5, 10.5, 11.5, 12.5]
+MARGEN_CASA = 0.06        # Sobreprecio medio (overround) de cada casa
+LATENCIA_MS = (5, 40)     # Latencia simulada por respuesta (mín, máx)
+TASA_ERRORES = 0.05       # Proporción de respuestas 503 para ejercitar el backoff del cliente
+
+# --- GENERACIÓN DE CUOTAS ---
+
+def cargar_probabilidades_base():
+    """Probabilidad 'justa' de Más X.5 por partido (del modelo si existe; si no, 0.5 en todas las líneas)."""
+    try:
+        df = pd.read_csv(PROBABILIDADES_PATH)
+        columnas = [f'Prob_MAS_{int(linea)}_5' for linea in LINEAS]
+        return {(r['Local'], r['Visitante']): r[columnas].to_numpy(dtype=float) for _, r in df.iterrows()}
+    except FileNotFoundError:
+        fixtures = cargar_fixtures(FIXTURES_PATH)
+        return {(l, v): np.full(len(LINEAS), 0.5) for l, v in zip(fixtures['Local'], fixtures['Visitante'])}
+
+
+def generar_cuotas_casa(casa, prob_base, rng):
+    """Respuesta JSON de una casa: cuotas Over/Under con ruido y margen, como un feed real."""
+    partidos = []
+    for (local, visitante), p_mas in prob_base.items():
+        ruido = np.clip(p_mas + rng.normal(0, 0.03, len(p_mas)), 0.02, 0.98)
+        margen = 1 + MARGEN_CASA * rng.uniform(0.5, 1.5)
+        partidos.append({
+            'local': local,
+            'visitante': visitante,
+            'mercados': [
+                {'linea': linea, 'over': round(1 / (p * margen), 2), 'under': round(1 / ((1 - p) * margen), 2)}
+                for linea, p in zip(LINEAS, ruido)
+            ],
+        })
+    return {'casa': casa, 'partidos': partidos}
+
+# --- APLICACIÓN aiohttp ---
+
+def crear_app(n_casas=N_CASAS, latencia_ms=LATENCIA_MS, tasa_errores=TASA_ERRORES, semilla=None):
+    """Servidor local que imita varios endpoints de casas de apuestas: GET /casas/{casa}/cuotas."""
+    rng = np.random.default_rng(semilla)
+    aleatorio = random.Random(semilla)
+    prob_base = cargar_probabilidades_base()
+    casas = {f'casa{i}' for i in range(1, n_casas + 1)}
+
+    async def cuotas(request):
+        casa = request.match_info['casa']
+        if casa not in casas:
+            raise web.HTTPNotFound()
+        await asyncio.sleep(aleatorio.uniform(*latencia_ms) / 1000)
+        if aleatorio.random() < tasa_errores:
+            return web.Response(status=503, headers={'Retry-After': '0.05'})
+        return web.json_response(generar_cuotas_casa(casa, prob_base, rng))
+
+    app = web.Application()
+    app.router.add_get('/casas/{casa}/cuotas', cuotas)
+    app['casas'] = sorted(casas)
+    return app
+
+
+async def iniciar_servidor(host=HOST, puerto=PUERTO, **kwargs):
+    """Arranca el servidor en el bucle actual y devuelve el runner (llamar a runner.cleanup() al terminar)."""
+    runner = web.AppRunner(crear_app(**kwargs))
+    await runner.setup()
+    await web.TCPSite(runner, host, puerto).start()
+    return runner
+
+
+if __name__ == "__main__":
+    print(f"🖥️ Servidor de cuotas simulado en http://{HOST}:{PUERTO}/casas/casa1/cuotas ({N_CASAS} casas)")
+    web.run_app(crear_app(), host=HOST, port=PUERTO, print=None)
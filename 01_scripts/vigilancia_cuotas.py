@@ -0,0 +1,124 @@
+import os
+import time
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+from kelly_vectorizado import imprimir_reporte, matriz_cuotas, matriz_probabilidades, optimos_por_partido, tabla_kelly
+
+# --- CONFIGURACIÓN DE RUTAS ---
+BASE_DIR = Path(__file__).resolve().parent
+PROYECTO_ROOT = BASE_DIR.parent
+
+# Probabilidades ya calculadas por '03_prediccion_jornada.py' (no se recalcula el historial)
+PROBABILIDADES_PATH = PROYECTO_ROOT / '04_Modelos_Entrenados' / 'predicciones_jornada_V6_REAL.csv'
+CUOTAS_PATH = PROYECTO_ROOT / '04_Modelos_Entrenados' / 'cuotas_jornada.csv'
+
+# --- PARÁMETROS DE VIGILANCIA ---
+INTERVALO_SONDEO = 0.05 # Segundos entre comprobaciones de la fecha de modificación
+
+# --- ESTADO EN MEMORIA ---
+
+def crear_estado(df_probabilidades):
+    """
+    Estado de la jornada: probabilidades del modelo, últimas cuotas vistas y tabla Kelly vigente
+    (None hasta el primer cálculo; se construye con el primer resultado de 'tabla_kelly').
+    """
+    return {
+        'prob': matriz_probabilidades(df_probabilidades),
+        'cuotas': None,
+        'kelly': None,
+        'mtime': None,
+    }
+
+
+def detectar_cambios(cuotas_previas, cuotas_nuevas):
+    """Partidos cuyas cuotas cambiaron (incluye altas y bajas). Comparación vectorizada y sensible a NaN."""
+    if cuotas_previas is None:
+        return cuotas_nuevas.index
+
+    comunes = cuotas_previas.index.intersection(cuotas_nuevas.index)
+    a = cuotas_previas.loc[comunes].to_numpy()
+    b = cuotas_nuevas.loc[comunes].to_numpy()
+    distintos = ~((a == b) | (np.isnan(a) & np.isnan(b)))
+    modificados = comunes[distintos.any(axis=1)]
+
+    altas = cuotas_nuevas.index.difference(cuotas_previas.index)
+    bajas = cuotas_previas.index.difference(cuotas_nuevas.index)
+    return modificados.append(altas).append(bajas)
+
+
+def actualizar_estado(estado, cuotas_nuevas):
+    """Recalcula Kelly sólo para los partidos afectados. Devuelve los partidos actualizados."""
+    cambiados = detectar_cambios(estado['cuotas'], cuotas_nuevas)
+    if len(cambiados) == 0:
+        estado['cuotas'] = cuotas_nuevas
+        return cambiados
+
+    vigentes = cambiados.intersection(cuotas_nuevas.index)
+    df_nuevos = tabla_kelly(estado['prob'], cuotas_nuevas.loc[vigentes])
+
+    # Filas vigentes de los partidos sin cambios + las recalculadas (sólo se concatenan tablas con filas)
+    df_kelly = estado['kelly']
+    if df_kelly is not None:
+        df_kelly = df_kelly[~df_kelly['Partido'].isin(cambiados)]
+    partes = [df for df in (df_kelly, df_nuevos) if df is not None and not df.empty]
+    estado['kelly'] = pd.concat(partes, ignore_index=True) if partes else df_nuevos
+    estado['cuotas'] = cuotas_nuevas
+    return cambiados
+
+
+def leer_cuotas(cuotas_path):
+    """Lee el CSV de cuotas; None si está a medio escribir o vacío (se reintenta en el siguiente sondeo)."""
+    try:
+        return matriz_cuotas(pd.read_csv(cuotas_path))
+    except (pd.errors.EmptyDataError, pd.errors.ParserError, KeyError, FileNotFoundError):
+        return None
+
+# --- BUCLE DE VIGILANCIA ---
+
+def vigilar_cuotas(probabilidades_path, cuotas_path, intervalo=INTERVALO_SONDEO):
+    try:
+        df_probabilidades = pd.read_csv(probabilidades_path)
+    except FileNotFoundError:
+        print(f"\n🚨 ERROR: No se encontraron las probabilidades: {probabilidades_path.name}")
+        print("Ejecuta primero '03_prediccion_jornada.py'.")
+        return
+
+    estado = crear_estado(df_probabilidades)
+
+    print("\n" + "="*80)
+    print("      👀 VIGILANDO CAMBIOS DE CUOTAS (Ctrl+C para salir)")
+    print(f"      Archivo: {cuotas_path.name} | Partidos en memoria: {len(estado['prob'])}")
+    print("="*80)
+
+    try:
+        while True:
+            try:
+                mtime = os.stat(cuotas_path).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+
+            if mtime is not None and mtime != estado['mtime']:
+                t0 = time.perf_counter()
+                cuotas_nuevas = leer_cuotas(cuotas_path)
+                if cuotas_nuevas is not None:
+                    estado['mtime'] = mtime
+                    cambiados = actualizar_estado(estado, cuotas_nuevas)
+
+                    if len(cambiados) > 0:
+                        df_optimos = optimos_por_partido(estado['kelly'])
+                        latencia = (time.perf_counter() - t0) * 1000
+                        print("\n" + "="*80)
+                        print(f"      🔄 {pd.Timestamp.now():%H:%M:%S} | {len(cambiados)} partido(s) con cuotas nuevas "
+                              f"| recalculado en {latencia:.2f} ms")
+                        print("="*80)
+                        imprimir_reporte(df_optimos)
+
+            time.sleep(intervalo)
+    except KeyboardInterrupt:
+        print("\n👋 Vigilancia detenida.")
+
+
+if __name__ == "__main__":
+    vigilar_cuotas(PROBABILIDADES_PATH, CUOTAS_PATH)